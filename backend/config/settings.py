@@ -14,6 +14,50 @@ class Settings:
         self.MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "4"))
         self.PARALLEL_PROCESSING_THRESHOLD: int = int(os.getenv("PARALLEL_PROCESSING_THRESHOLD", "20"))
         self.GPU_MEMORY_FRACTION: float = float(os.getenv("GPU_MEMORY_FRACTION", "0.8"))
+
+        # PDF Layout Configuration
+        # With table translation on, text items covered by a table by at least this fraction are left to the table
+        self.PDF_TABLE_OVERLAP_THRESHOLD: float = float(os.getenv("PDF_TABLE_OVERLAP_THRESHOLD", "0.8"))
+        self.PDF_MERGE_LINE_FRAGMENTS: bool = os.getenv("PDF_MERGE_LINE_FRAGMENTS", "true").lower() == "true"
+        self.PDF_LINE_FRAGMENT_MAX_GAP: float = float(os.getenv("PDF_LINE_FRAGMENT_MAX_GAP", "6"))
+        # Reading-order-adjacent items of these labels in one column are translated as one segment
+        self.PDF_MERGE_PARAGRAPHS: bool = os.getenv("PDF_MERGE_PARAGRAPHS", "true").lower() == "true"
+        self.PDF_PARAGRAPH_LABELS: list[str] = [
+            label.strip() for label in os.getenv("PDF_PARAGRAPH_LABELS", "text,paragraph,list_item").split(",") if label.strip()
+        ]
+        self.PDF_SEGMENT_TOKEN_BUDGET: int = int(os.getenv("PDF_SEGMENT_TOKEN_BUDGET", "400"))
+        self.PDF_SEGMENT_MAX_GAP: float = float(os.getenv("PDF_SEGMENT_MAX_GAP", "12"))
+        # html lays out every translation with MuPDF's HTML engine; auto writes one-line Latin-1 text as plain text
+        self.PDF_TEXT_RENDER_MODE: str = os.getenv("PDF_TEXT_RENDER_MODE", "auto").lower()
+        self.PDF_TEXT_LAYOUT_CACHE_SIZE: int = int(os.getenv("PDF_TEXT_LAYOUT_CACHE_SIZE", "2048"))
+
+        # Upstream LLM Client Configuration
+        self.LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.LLM_RETRY_BACKOFF_BASE: float = float(os.getenv("LLM_RETRY_BACKOFF_BASE", "0.5"))
+        self.LLM_RETRY_BACKOFF_MAX: float = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "30"))
+        self.LLM_HEDGING_ENABLED: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+        self.LLM_HEDGE_QUANTILE: float = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+        self.LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+        # Observability Configuration
+        self.LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+        self.LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").lower()  # text or json
+        self.LOG_SAMPLE_INTERVAL_SECONDS: float = float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "5"))
+        self.METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+        self.TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none").lower()  # none, console or file
+        self.TRACING_FILE_PATH: str = os.getenv("TRACING_FILE_PATH", "traces/spans.jsonl")
+        self.TRACE_TIMELINE_DIR: str = os.getenv("TRACE_TIMELINE_DIR", "")
+        self.PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+        self.PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+        self.PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+        self.PROFILE_TOP_ALLOCATIONS: int = int(os.getenv("PROFILE_TOP_ALLOCATIONS", "25"))
+
+        # PDF Job Duration Estimator Configuration
+        self.ESTIMATOR_ENABLED: bool = os.getenv("ESTIMATOR_ENABLED", "true").lower() == "true"
+        self.ESTIMATOR_DB_PATH: str = os.getenv("ESTIMATOR_DB_PATH", "estimates/pdf_jobs.sqlite3")
+        self.ESTIMATOR_MIN_SAMPLES: int = int(os.getenv("ESTIMATOR_MIN_SAMPLES", "8"))
+        self.ESTIMATOR_MAX_SAMPLES: int = int(os.getenv("ESTIMATOR_MAX_SAMPLES", "500"))
     
     @staticmethod
     def get_api_config(url: Optional[str] = None, authorization: Optional[str] = None, model_name: Optional[str] = None) -> tuple[str, str, str]:
@@ -1,18 +1,29 @@
+import asyncio
 import mimetypes
 import tempfile
 import io
 import os
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse
+import time
+import uuid
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Optional
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Local imports
 from config.settings import settings
-from models.schemas import TranslationRequest, PromptPageRequest, StructuredInferenceRequest, FreeProcessingRequest
+from models.schemas import TranslationRequest, PromptPageRequest, StructuredInferenceRequest, FreeProcessingRequest, PdfEstimateRequest
 from services.translation_service import TranslationService
 from services.document_service import DocumentService
 from services.llm_service import LLMService
-from utils.logger import app_logger
+from utils.logger import app_logger, request_id_var, job_id_var, stop_logging
+from utils.api_client import latency_tracker
+from utils.estimator import job_estimator, pdf_quick_features
+from utils import metrics
+from utils.tracing import tracer
+from utils.profiling import profile_job
 
 # Initialize services
 translation_service = TranslationService()
@@ -31,6 +42,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-endpoint latency and in-flight request counts"""
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+
+    # Only label known routes so unknown paths cannot blow up label cardinality
+    endpoint = request.url.path if request.url.path in _route_paths() else "other"
+    method = request.method
+    status = "500"
+    start = time.perf_counter()
+    metrics.http_requests_in_flight.inc(endpoint=endpoint)
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        metrics.http_requests_in_flight.dec(endpoint=endpoint)
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start, endpoint=endpoint, method=method, status=status
+        )
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag all log records of a request with a request id, reusing the caller's X-Request-Id if given"""
+    request_id = request.headers.get("X-Request-Id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-Id"] = request_id
+        return response
+    finally:
+        request_id_var.reset(token)
+
+@lru_cache(maxsize=1)
+def _route_paths() -> frozenset:
+    """Route templates registered on the app (computed once, after all routes are added)"""
+    return frozenset(getattr(route, "path", None) for route in app.routes)
+
 @app.on_event("startup")
 async def startup_event():
     app_logger.info("Digitalisation Toolkit API starting up")
@@ -38,7 +88,17 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     app_logger.info("Digitalisation Toolkit API shutting down")
+    tracer.shutdown()
+    stop_logging()
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Endpoint exposing in-process metrics in the Prometheus text format.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/translate")
 async def translate(request: TranslationRequest):
@@ -75,10 +135,13 @@ async def translate_pdf(
     include_tbl_content: bool = Form(...),
     url: str = Form(...),
     authorization: str = Form(...),  
-    translation_model_name: str = Form(...)
+    translation_model_name: str = Form(...),
+    profile: bool = Form(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """
-    API endpoint to handle PDF translation
+    API endpoint to handle PDF translation.
+    Set the `profile` form field or an `X-Profile: 1` header to profile the job (requires PROFILING_ENABLED).
     """
     try:
         app_logger.info("Received PDF translation request")
@@ -95,30 +158,73 @@ async def translate_pdf(
             temp_file.write(await file.read())
             temp_file_path = temp_file.name
 
+        trace_id = ""
         try:
             # Get API configuration
             final_url, final_auth, final_model = settings.get_api_config(
                 url, authorization, translation_model_name
             )
 
+            # Profile the job when requested and allowed by configuration
+            profile_requested = profile or (x_profile or "").lower() in ("1", "true", "yes")
+            if profile_requested and not settings.PROFILING_ENABLED:
+                app_logger.warning("Profiling requested but PROFILING_ENABLED is false, ignoring")
+            profile_id = ""
+
             # Translate PDF using document service
-            translated_pdf_bytes = await document_service.translate_pdf(
-                temp_file_path,
-                input_language,
-                output_language,
-                include_tbl_content,
-                final_url,
-                final_auth,
-                final_model
-            )
+            with metrics.pdf_jobs_in_flight.track(), tracer.start_span(
+                "pdf.translate_job", file_name=file.filename, model=final_model, include_tables=include_tbl_content
+            ) as job_span:
+                trace_id = job_span.trace_id
+                job_id_var.set(trace_id or uuid.uuid4().hex)
+                if profile_requested and settings.PROFILING_ENABLED:
+                    profile_id = job_id_var.get()
+                    profiler = profile_job(
+                        profile_id,
+                        settings.PROFILE_DIR,
+                        interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+                        top_allocations=settings.PROFILE_TOP_ALLOCATIONS
+                    )
+                else:
+                    profiler = nullcontext()
+                if settings.TRACE_TIMELINE_DIR:
+                    tracer.record_timeline(trace_id)
+                job_stats = {}
+                job_start_time = time.perf_counter()
+                with profiler:
+                    translated_pdf_bytes = await document_service.translate_pdf(
+                        temp_file_path,
+                        input_language,
+                        output_language,
+                        include_tbl_content,
+                        final_url,
+                        final_auth,
+                        final_model,
+                        stats=job_stats
+                    )
+                job_duration = time.perf_counter() - job_start_time
+                job_span.set_attribute("output_bytes", len(translated_pdf_bytes))
+
+            if settings.ESTIMATOR_ENABLED:
+                await _record_pdf_job(temp_file_path, final_model, include_tbl_content, job_duration, job_stats)
 
             app_logger.info("Successfully generated translated PDF")
+            headers = {"Content-Disposition": "attachment; filename=translated.pdf"}
+            if trace_id:
+                headers["X-Trace-Id"] = trace_id
+            if profile_id:
+                headers["X-Profile-Id"] = profile_id
             return StreamingResponse(
                 io.BytesIO(translated_pdf_bytes),
                 media_type="application/pdf",
-                headers={"Content-Disposition": "attachment; filename=translated.pdf"}
+                headers=headers
             )
         finally:
+            # Write the per-job timeline next to other job artefacts, even for failed jobs
+            if trace_id and settings.TRACE_TIMELINE_DIR:
+                timeline_path = tracer.dump_timeline(trace_id, settings.TRACE_TIMELINE_DIR)
+                if timeline_path:
+                    app_logger.info(f"Wrote job timeline: {timeline_path}")
             # Clean up temporary file
             if os.path.exists(temp_file_path):
                 os.unlink(temp_file_path)
@@ -131,6 +237,45 @@ async def translate_pdf(
         app_logger.error(f"PDF translation endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def _record_pdf_job(file_path: str, model: str, include_tables: bool, duration: float, job_stats: dict) -> None:
+    """Store a finished job for the duration estimator; never fails the job itself"""
+    try:
+        features = await asyncio.to_thread(pdf_quick_features, file_path)
+        await asyncio.to_thread(
+            job_estimator.record_job,
+            features,
+            model,
+            include_tables,
+            duration,
+            segments=job_stats.get("segments"),
+            table_cells=job_stats.get("table_cells"),
+            upstream_latency=latency_tracker.quantile(model, 0.5, 1)
+        )
+    except Exception as e:
+        app_logger.warning(f"Could not record PDF job for duration estimates: {str(e)}")
+
+@app.post("/estimate")
+async def estimate_pdf_job(request: PdfEstimateRequest):
+    """
+    Endpoint predicting the duration of a PDF translation job from quick PyMuPDF features.
+    `estimated_seconds` is null until enough jobs have been recorded (ESTIMATOR_MIN_SAMPLES).
+    """
+    if not settings.ESTIMATOR_ENABLED:
+        raise HTTPException(status_code=404, detail="Estimates are disabled")
+    try:
+        return await asyncio.to_thread(
+            job_estimator.estimate,
+            request.pages,
+            request.scanned_page_ratio,
+            request.text_blocks,
+            request.file_mb,
+            request.include_tbl_content,
+            request.translation_model_name,
+            upstream_latency=latency_tracker.quantile(request.translation_model_name, 0.5, 1)
+        )
+    except Exception as e:
+        app_logger.error(f"Estimate endpoint error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/free-processing")
 async def free_processing(request: FreeProcessingRequest):  
@@ -0,0 +1,158 @@
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from utils.logger import app_logger
+
+# Element boxes in PyMuPDF's top-left coordinates, with the 1-based page number
+BOX_DTYPE = np.dtype([("l", "f8"), ("t", "f8"), ("r", "f8"), ("b", "f8"), ("page", "i4")])
+BOX_FIELDS = ["l", "t", "r", "b"]
+
+# Clamp to reasonable PDF coordinate bounds
+MAX_COORD = 99999.0
+
+TABLE_CELL_LABEL = sys.intern("table_cell")
+
+
+@dataclass(slots=True)
+class Elements:
+    """Text elements in reading order: parallel lists of (interned) strings and a structured array of boxes"""
+
+    texts: List[str]
+    labels: List[str]
+    boxes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def empty(cls) -> "Elements":
+        return cls([], [], np.empty(0, dtype=BOX_DTYPE))
+
+    def rects(self) -> List[Tuple[float, float, float, float]]:
+        """(l, t, r, b) of every element, converted to Python floats in one pass"""
+        return self.boxes[BOX_FIELDS].tolist()
+
+    @classmethod
+    def from_rects(
+        cls, texts: List[str], labels: List[str], rects: List[Tuple[float, float, float, float]], page_no: int
+    ) -> "Elements":
+        if not rects:
+            return cls.empty()
+        return cls(texts, labels, np.array([(*rect, page_no) for rect in rects], dtype=BOX_DTYPE))
+
+    def select(self, indices: List[int]) -> "Elements":
+        """The elements at `indices`, in that order"""
+        return Elements(
+            [self.texts[i] for i in indices],
+            [self.labels[i] for i in indices],
+            self.boxes[np.asarray(indices, dtype=np.intp)]
+        )
+
+
+@dataclass(slots=True)
+class TableLayout:
+    bbox: Tuple[float, float, float, float]
+    cells: Elements
+
+
+@dataclass(slots=True)
+class PageLayout:
+    page_no: int
+    width: float
+    height: float
+    texts: Elements = field(default_factory=Elements.empty)
+    tables: List[TableLayout] = field(default_factory=list)
+
+
+# Page number -> page layout
+DocumentLayout = Dict[int, PageLayout]
+
+
+def _is_bottom_left(bbox: Any) -> bool:
+    origin = getattr(bbox, "coord_origin", "BOTTOMLEFT")
+    return getattr(origin, "value", origin) == "BOTTOMLEFT"
+
+
+def _to_top_left(rows: List[Tuple[float, float, float, float, int]], bottom_left: List[bool], heights: np.ndarray) -> np.ndarray:
+    """Boxes as a BOX_DTYPE array, with bottom-left boxes flipped to top-left origin in one vectorized step"""
+    boxes = np.array(rows, dtype=BOX_DTYPE) if rows else np.empty(0, dtype=BOX_DTYPE)
+    flip = np.asarray(bottom_left, dtype=bool)
+    page_heights = heights[boxes["page"]][flip]
+    for name in ("t", "b"):
+        boxes[name][flip] = page_heights - boxes[name][flip]
+    for name in BOX_FIELDS:
+        np.clip(boxes[name], -MAX_COORD, MAX_COORD, out=boxes[name])
+    return boxes
+
+
+def _split_by_page(boxes: np.ndarray, *columns: List[str]):
+    """Yield (page_no, boxes, columns...) per page, keeping reading order within each page"""
+    order = np.argsort(boxes["page"], kind="stable")
+    boxes = boxes[order]
+    columns = [[column[i] for i in order.tolist()] for column in columns]
+    page_numbers, starts = np.unique(boxes["page"], return_index=True)
+    stops = list(starts[1:]) + [len(boxes)]
+    for page_no, start, stop in zip(page_numbers.tolist(), starts.tolist(), stops):
+        yield (page_no, boxes[start:stop], *(column[start:stop] for column in columns))
+
+
+def layout_from_docling(document: Any) -> DocumentLayout:
+    """Build the page layout by walking a DoclingDocument's texts and tables.
+
+    Only the first provenance of each element is used. Strings are interned, so
+    repeated headers, footers and labels share one object.
+    """
+    layout: DocumentLayout = {
+        page_no: PageLayout(page_no, float(page.size.width), float(page.size.height))
+        for page_no, page in sorted(document.pages.items())
+    }
+    heights = np.zeros(max(layout, default=0) + 1)
+    for page_no, page in layout.items():
+        heights[page_no] = page.height
+
+    texts, labels, rows, bottom_left = [], [], [], []
+    for item in document.texts:
+        if not item.prov or item.prov[0].page_no not in layout:
+            continue
+        prov = item.prov[0]
+        bbox = prov.bbox
+        texts.append(sys.intern(item.text))
+        labels.append(sys.intern(str(getattr(item.label, "value", item.label))))
+        rows.append((bbox.l, bbox.t, bbox.r, bbox.b, prov.page_no))
+        bottom_left.append(_is_bottom_left(bbox))
+    boxes = _to_top_left(rows, bottom_left, heights)
+    for page_no, page_boxes, page_texts, page_labels in _split_by_page(boxes, texts, labels):
+        layout[page_no].texts = Elements(page_texts, page_labels, page_boxes)
+
+    # Tables and all their cells are flipped together, then split back per table
+    tables, table_rows, table_bottom_left = [], [], []
+    cell_texts, cell_rows, cell_bottom_left, cell_table = [], [], [], []
+    for item in document.tables:
+        if not item.prov or item.prov[0].page_no not in layout:
+            continue
+        prov = item.prov[0]
+        table_index = len(tables)
+        tables.append(prov.page_no)
+        table_rows.append((prov.bbox.l, prov.bbox.t, prov.bbox.r, prov.bbox.b, prov.page_no))
+        table_bottom_left.append(_is_bottom_left(prov.bbox))
+        for cell in item.data.table_cells:
+            if cell.bbox is None:
+                app_logger.warning(f"Missing 'bbox' for table cell: {cell.text[:50]}")
+                continue
+            cell_texts.append(sys.intern(cell.text))
+            cell_rows.append((cell.bbox.l, cell.bbox.t, cell.bbox.r, cell.bbox.b, prov.page_no))
+            cell_bottom_left.append(_is_bottom_left(cell.bbox))
+            cell_table.append(table_index)
+
+    table_boxes = _to_top_left(table_rows, table_bottom_left, heights)
+    cell_boxes = _to_top_left(cell_rows, cell_bottom_left, heights)
+    # Cells were appended table by table, so each table's cells are one contiguous slice
+    cell_starts = np.searchsorted(np.asarray(cell_table, dtype=np.int64), np.arange(len(tables) + 1))
+    for table_index, page_no in enumerate(tables):
+        start, stop = int(cell_starts[table_index]), int(cell_starts[table_index + 1])
+        layout[page_no].tables.append(TableLayout(
+            tuple(table_boxes[BOX_FIELDS][table_index].tolist()),
+            Elements(cell_texts[start:stop], [TABLE_CELL_LABEL] * (stop - start), cell_boxes[start:stop])
+        ))
+    return layout
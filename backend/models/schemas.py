@@ -58,4 +58,14 @@ class FreeProcessingRequest(BaseModel):
     user_prompt: str
     url: str
     authorization: str
-    model_name: str
\ No newline at end of file
+    model_name: str
+
+class PdfEstimateRequest(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
+    pages: int
+    scanned_page_ratio: float = 0.0
+    text_blocks: int = 0
+    file_mb: float = 0.0
+    include_tbl_content: bool = False
+    translation_model_name: str = ""
@@ -8,9 +8,14 @@ from pypdf import PdfReader, PdfWriter
 from docling.datamodel.base_models import InputFormat
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.pipeline_options import PdfPipelineOptions, EasyOcrOptions
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from config.settings import settings
-from utils.logger import app_logger
+from models.layout import DocumentLayout, Elements, PageLayout, layout_from_docling
+from utils.logger import app_logger, hot_path_logger
+from utils import metrics
+from utils.tracing import tracer
+from utils.spatial_index import GridIndex, area, contains, intersection_area, normalize
+from utils.text_layout import TextBoxRenderer
 from .translation_service import TranslationService
 import tempfile
 
@@ -37,9 +42,13 @@ class DocumentService:
         include_tbl: bool,
         url: str,
         authorization: str,
-        model_name: str
+        model_name: str,
+        stats: Optional[Dict[str, Any]] = None
     ) -> bytes:
-        """Translate PDF document and return translated PDF bytes with concurrent processing"""
+        """Translate PDF document and return translated PDF bytes with concurrent processing.
+
+        If `stats` is given it is filled with the job's page, segment and table cell counts.
+        """
         try:
             app_logger.info("Starting PDF translation")
 
@@ -52,8 +61,10 @@ class DocumentService:
                 app_logger.info(f"GPU 0 memory - Total: {gpu_memory:.1f}GB, Allocated: {allocated_memory:.1f}GB")
 
             # Validate PDF
-            reader = PdfReader(file_path)
-            total_pages = len(reader.pages)
+            with tracer.start_span("pdf.validate", file_bytes=os.path.getsize(file_path)) as span:
+                reader = PdfReader(file_path)
+                total_pages = len(reader.pages)
+                span.set_attribute("pages", total_pages)
             if total_pages == 0:
                 raise ValueError("The PDF document is empty.")
         except Exception as e:
@@ -61,38 +72,43 @@ class DocumentService:
 
         # Process document structure
         app_logger.info("Processing PDF document")
-        redoc = self._convert_document_structure(file_path, input_lang)
-        doc_info = redoc["Pages"]
+        conversion_start_time = time.perf_counter()
+        with tracer.start_span("docling.convert", pages=total_pages) as span:
+            layout = self._convert_document_structure(file_path, input_lang)
+            span.set_attribute("text_elements", sum(len(page.texts) for page in layout.values()))
+            span.set_attribute("tables", sum(len(page.tables) for page in layout.values()))
+        conversion_time = time.perf_counter() - conversion_start_time
+        metrics.pdf_stage_duration.observe(conversion_time, stage="conversion")
+        metrics.docling_conversion_seconds_per_page.observe(conversion_time / total_pages)
+
+        # Clean up the layout first, so translation and rewrite work on the same elements
+        with tracer.start_span("layout.prepare") as span:
+            elements_before = sum(len(page.texts) for page in layout.values())
+            self._prepare_layout(layout, include_tbl)
+            span.set_attribute("text_elements_removed", elements_before - sum(len(page.texts) for page in layout.values()))
 
         # Collect all texts for batch translation
         all_texts = []
-        text_mapping = {}
+        queued_texts = set()
 
-        for page_no, page_data in doc_info.items():
-            for i, text_info in enumerate(page_data["Texts"]):
-                text_content = text_info["text"]
+        for page_layout in layout.values():
+            segments = [("text", text) for text in page_layout.texts.texts]
+            if include_tbl:
+                segments += [("table", text) for table in page_layout.tables for text in table.cells.texts]
+            for element_type, text_content in segments:
                 if text_content.strip():
+                    if text_content in queued_texts:
+                        # Identical segment already queued, reuse its translation
+                        metrics.translation_cache_hits.inc()
+                        continue
+                    metrics.segments_translated.inc(element_type=element_type)
                     all_texts.append(text_content)
-                    text_mapping[text_content] = {
-                        "page_no": page_no,
-                        "element_type": "text",
-                        "index": i,
-                        "bbox": text_info["bbox"]
-                    }
+                    queued_texts.add(text_content)
 
-            if include_tbl:
-                for table_i, table_info in enumerate(page_data["Tables"]):
-                    for cell_i, cell in enumerate(table_info["table_cells"]):
-                        table_text = cell["text"]
-                        if table_text.strip():
-                            all_texts.append(table_text)
-                            text_mapping[table_text] = {
-                                "page_no": page_no,
-                                "element_type": "table",
-                                "table_index": table_i,
-                                "cell_index": cell_i,
-                                "bbox": cell["bbox"]
-                            }
+        if stats is not None:
+            stats["pages"] = total_pages
+            stats["segments"] = len(all_texts)
+            stats["table_cells"] = sum(len(table.cells) for page in layout.values() for table in page.tables)
 
         # Batch translate all texts with timeout monitoring
         app_logger.info(f"Batch translating {len(all_texts)} text elements")
@@ -100,11 +116,19 @@ class DocumentService:
 
         if all_texts:
             try:
-                translated_texts = await self.translation_service.translate_batch(
-                    all_texts, input_lang, output_lang, url, authorization, model_name
-                )
+                with tracer.start_span(
+                    "llm.translate_batch",
+                    segments=len(all_texts),
+                    input_chars=sum(len(text) for text in all_texts),
+                    model=model_name
+                ) as span:
+                    translated_texts = await self.translation_service.translate_batch(
+                        all_texts, input_lang, output_lang, url, authorization, model_name
+                    )
+                    span.set_attribute("output_chars", sum(len(text) for text in translated_texts))
                 translation_map = dict(zip(all_texts, translated_texts))
                 translation_time = time.time() - translation_start_time
+                metrics.pdf_stage_duration.observe(translation_time, stage="translation")
                 app_logger.info(f"Translation completed in {translation_time:.2f} seconds")
             except Exception as e:
                 app_logger.error(f"Translation failed after {time.time() - translation_start_time:.2f}s: {str(e)}")
@@ -118,64 +142,12 @@ class DocumentService:
 
         try:
             with fitz.open(file_path) as doc:
+                rewrite_start_time = time.perf_counter()
                 ocg_xref = doc.add_ocg(f"{output_lang} Translation", on=True)
 
-                for page in doc:
-                    page_no = str(page.number + 1)
-                    app_logger.info(f"Processing page {page_no}")
-
-                    if page_no not in doc_info:
-                        continue
+                self._rewrite_pages(doc, layout, translation_map, include_tbl, ocg_xref)
 
-                    # Apply translated text elements
-                    for text_info in doc_info[page_no]["Texts"]:
-                        try:
-                            text_content = text_info["text"]
-                            if text_content.strip() and text_content in translation_map:
-                                text_bbox = text_info["bbox"]
-                                translated_text = translation_map[text_content]
-                                text_rect = fitz.Rect(self._reformat_bbox(text_bbox))
-                                page.add_redact_annot(text_rect, text="")
-                                page.apply_redactions()
-                                page.insert_htmlbox(
-                                    text_rect,
-                                    f"<div style='font-family: sans-serif;'>{translated_text}</div>",
-                                    oc=ocg_xref
-                                )
-                            elif text_content.strip():
-                                app_logger.warning(f"Translation missing for text: '{text_content[:50]}...'")
-                        except (KeyError, ValueError, Exception) as e:
-                            app_logger.error(f"Error processing text element on page {page_no}: {str(e)}")
-                            continue
-
-                    # Apply translated table elements if requested
-                    if include_tbl:
-                        for table_info in doc_info[page_no]["Tables"]:
-                            try:
-                                for cell in table_info["table_cells"]:
-                                    try:
-                                        table_text = cell["text"]
-                                        if table_text.strip() and table_text in translation_map:
-                                            table_bbox = cell["bbox"]
-                                            translated_text = translation_map[table_text]
-                                            table_rect = fitz.Rect(self._reformat_bbox(table_bbox))
-                                            page.add_redact_annot(table_rect, text="")
-                                            page.apply_redactions()
-                                            page.insert_htmlbox(
-                                                table_rect,
-                                                f"<div style='font-family: sans-serif;'>{translated_text}</div>",
-                                                oc=ocg_xref
-                                            )
-                                        elif table_text.strip():
-                                            app_logger.warning(f"Translation missing for table text: '{table_text[:50]}...'")
-                                    except (KeyError, ValueError, Exception) as e:
-                                        app_logger.error(f"Error processing table cell on page {page_no}: {str(e)}")
-                                        continue
-                            except Exception as e:
-                                app_logger.error(f"Error processing table on page {page_no}: {str(e)}")
-                                continue
-
-                    page.clean_contents()
+                metrics.pdf_stage_duration.observe(time.perf_counter() - rewrite_start_time, stage="rewrite")
 
                 # Clear GPU cache and system memory before memory-intensive PDF operations
                 if torch.cuda.is_available():
@@ -186,6 +158,7 @@ class DocumentService:
                 gc.collect()
 
                 app_logger.info("Starting PDF finalization and compression")
+                save_start_time = time.perf_counter()
                 try:
                     # Monitor memory before finalization
                     if torch.cuda.is_available():
@@ -193,11 +166,14 @@ class DocumentService:
                         app_logger.info(f"GPU memory before finalization: {gpu_mem_before:.2f}GB")
 
                     # Subset fonts to reduce memory usage
-                    doc.subset_fonts()
+                    with tracer.start_span("pdf.subset_fonts"):
+                        doc.subset_fonts()
                     app_logger.debug("Font subsetting completed")
 
                     # Save with aggressive compression and cleanup
-                    doc.ez_save(output_path, clean=True, deflate=True, garbage=4, linear=True)
+                    with tracer.start_span("pdf.ez_save") as span:
+                        doc.ez_save(output_path, clean=True, deflate=True, garbage=4, linear=True)
+                        span.set_attribute("output_bytes", os.path.getsize(output_path))
                     app_logger.info("PDF saved successfully")
 
                 except Exception as save_error:
@@ -205,51 +181,19 @@ class DocumentService:
                     # Attempt fallback save without some optimizations
                     try:
                         app_logger.info("Attempting fallback save without linear optimization")
-                        doc.save(output_path, clean=True, deflate=True)
+                        with tracer.start_span("pdf.fallback_save"):
+                            doc.save(output_path, clean=True, deflate=True)
                         app_logger.info("PDF saved with fallback method")
                     except Exception as fallback_error:
                         app_logger.error(f"Fallback save also failed: {str(fallback_error)}")
                         raise Exception(f"PDF finalization failed: {str(save_error)}")
+                finally:
+                    metrics.pdf_stage_duration.observe(time.perf_counter() - save_start_time, stage="save")
 
-            # Compress using PdfWriter with memory management
-            app_logger.info("Starting PDF compression")
-            compression_successful = False
-            try:
-                writer = PdfWriter(clone_from=output_path)
-
-                # Process images in batches to manage memory
-                page_count = len(writer.pages)
-                app_logger.info(f"Compressing images in {page_count} pages")
-
-                # Make batch size configurable, default to 50
-                batch_size = getattr(settings, 'PDF_COMPRESSION_BATCH_SIZE', 50)
-                for i in range(0, page_count, batch_size):
-                    end_idx = min(i + batch_size, page_count)
-                    app_logger.debug(f"Processing image batch {i+1}-{end_idx}")
-
-                    try:
-                        for page_idx in range(i, end_idx):
-                            page = writer.pages[page_idx]
-                            for img in page.images:
-                                img.replace(img.image, quality=80)
-                    except Exception as batch_error:
-                        app_logger.warning(f"Error in compression batch {i+1}-{end_idx}: {str(batch_error)}")
-                        # Continue with next batch
-                        continue
-
-                    # Force garbage collection between batches
-                    gc.collect()
-
-                # Write compressed PDF
-                with open(output_path, "wb") as f:
-                    writer.write(f)
-
-                compression_successful = True
-                app_logger.info("PDF compression completed successfully")
+            compression_start_time = time.perf_counter()
+            compression_successful = self._compress_pdf(output_path)
 
-            except Exception as e:
-                app_logger.warning(f"PDF compression failed, using uncompressed version: {str(e)}")
-                compression_successful = False
+            metrics.pdf_stage_duration.observe(time.perf_counter() - compression_start_time, stage="compression")
 
             if not compression_successful:
                 app_logger.info("Proceeding with uncompressed PDF")
@@ -281,8 +225,8 @@ class DocumentService:
                 app_logger.debug("GPU cache cleared")
 
 
-    def _convert_document_structure(self, file_path: str, input_lang: str = None) -> Dict[str, Any]:
-        """Convert PDF to structured format using Docling"""
+    def _convert_document_structure(self, file_path: str, input_lang: str = None) -> DocumentLayout:
+        """Convert PDF to a compact page layout using Docling"""
         app_logger.info("Setting up Docling pipeline")
 
         # Configure OCR options with user-specified or default language detection
@@ -332,76 +276,280 @@ class DocumentService:
             app_logger.error(f"Document conversion error after {time.time() - start_time:.2f}s: {str(e)}")
             raise Exception(f"Document conversion error: {str(e)}")
         
-        doc = result.export_to_dict()
-        
-        # Process document structure
-        redoc = {"Pages": {}}
-        for page_no, page_dim in doc["pages"].items():
-            redoc["Pages"].update(
-                {page_no: {"Texts": [], "Tables": [], "Page_Size": page_dim["size"]}}
+        return layout_from_docling(result)
+
+    def _prepare_layout(self, layout: DocumentLayout, include_tbl: bool) -> None:
+        """Drop text items repeated by translated tables, then merge line fragments and paragraphs, page by page"""
+        for page_layout in layout.values():
+            if include_tbl:
+                self._drop_texts_in_tables(page_layout)
+            if settings.PDF_MERGE_LINE_FRAGMENTS:
+                self._merge_line_fragments(page_layout)
+            if settings.PDF_MERGE_PARAGRAPHS:
+                self._merge_paragraphs(page_layout)
+
+    def _drop_texts_in_tables(self, page_layout: PageLayout) -> None:
+        """Remove text items lying inside a table region; the table's cells already cover them"""
+        if not page_layout.tables or not len(page_layout.texts):
+            return
+        tables = GridIndex.from_rects(table.bbox for table in page_layout.tables)
+        threshold = settings.PDF_TABLE_OVERLAP_THRESHOLD
+        keep = []
+        for i, rect in enumerate(page_layout.texts.rects()):
+            rect = normalize(rect)
+            text_area = area(rect)
+            inside = any(
+                contains(tables.rects[t], rect) if text_area == 0
+                else intersection_area(rect, tables.rects[t]) >= threshold * text_area
+                for t in tables.query(rect)
+            )
+            if not inside:
+                keep.append(i)
+        if len(keep) < len(page_layout.texts):
+            page_layout.texts = page_layout.texts.select(keep)
+
+    def _merge_line_fragments(self, page_layout: PageLayout) -> None:
+        """Join text items that continue each other on the same line into one element.
+
+        A fragment continues another if it has the same label, overlaps it vertically by
+        at least half the smaller height, starts to the right of the other's start and at
+        most PDF_LINE_FRAGMENT_MAX_GAP points to the right of its end.
+        """
+        texts = page_layout.texts
+        if len(texts) < 2:
+            return
+        rects = [normalize(rect) for rect in texts.rects()]
+        index = GridIndex.from_rects(rects)
+        max_gap = settings.PDF_LINE_FRAGMENT_MAX_GAP
+
+        next_fragment: Dict[int, int] = {}
+        continued = set()
+        for i, rect in enumerate(rects):
+            best = None
+            for j in index.query((rect[2], rect[1], rect[2] + max_gap, rect[3])):
+                if j == i or j in continued or texts.labels[j] != texts.labels[i]:
+                    continue
+                other = rects[j]
+                vertical_overlap = min(rect[3], other[3]) - max(rect[1], other[1])
+                gap = other[0] - rect[2]
+                if vertical_overlap < 0.5 * min(rect[3] - rect[1], other[3] - other[1]) or not -1.0 <= gap <= max_gap:
+                    continue
+                # Successors start strictly further right, so two overlapping fragments
+                # can never continue each other and chains cannot loop
+                if other[0] <= rect[0]:
+                    continue
+                if best is None or other[0] < rects[best][0]:
+                    best = j
+            if best is not None:
+                next_fragment[i] = best
+                continued.add(best)
+        if not next_fragment:
+            return
+
+        chains: Dict[int, List[int]] = {}
+        visited = set()
+        for start in range(len(rects)):
+            if start in continued:
+                continue
+            chain = [start]
+            visited.add(start)
+            while chain[-1] in next_fragment and next_fragment[chain[-1]] not in visited:
+                chain.append(next_fragment[chain[-1]])
+                visited.add(chain[-1])
+            chains[start] = chain
+
+        merged_texts, merged_labels, merged_rects = [], [], []
+        for start in range(len(rects)):
+            # A fragment not reached from any chain start is kept on its own rather than dropped
+            chain = chains.get(start) or ([start] if start not in visited else None)
+            if chain is None:
+                continue
+            merged_texts.append(" ".join(texts.texts[i].strip() for i in chain))
+            merged_labels.append(texts.labels[start])
+            merged_rects.append((
+                min(rects[i][0] for i in chain), min(rects[i][1] for i in chain),
+                max(rects[i][2] for i in chain), max(rects[i][3] for i in chain)
+            ))
+        page_layout.texts = Elements.from_rects(merged_texts, merged_labels, merged_rects, page_layout.page_no)
+
+    def _merge_paragraphs(self, page_layout: PageLayout) -> None:
+        """Group reading-order-adjacent items into segments translated and laid out as one.
+
+        An item joins the previous segment if both have the same label (one of
+        PDF_PARAGRAPH_LABELS), share a column, are at most PDF_SEGMENT_MAX_GAP points apart
+        vertically and the merged text stays within PDF_SEGMENT_TOKEN_BUDGET. The segment
+        is rewritten into the union of the items' boxes, so items are only merged while
+        that box overlaps no other text item or table. Items are joined with newlines,
+        which are kept as line breaks when the translation is inserted.
+        """
+        texts = page_layout.texts
+        budget = settings.PDF_SEGMENT_TOKEN_BUDGET
+        if len(texts) < 2 or budget <= 0:
+            return
+        rects = [normalize(rect) for rect in texts.rects()]
+        # Tables come after the texts, so their ids never match a text item
+        index = GridIndex.from_rects(rects + [normalize(table.bbox) for table in page_layout.tables])
+        labels = set(settings.PDF_PARAGRAPH_LABELS)
+        max_gap = settings.PDF_SEGMENT_MAX_GAP
+
+        groups = [[0]]
+        union = rects[0]
+        tokens = self._estimate_tokens(texts.texts[0])
+        for i in range(1, len(texts)):
+            previous = groups[-1][-1]
+            label = texts.labels[i]
+            prev_rect, rect = rects[previous], rects[i]
+            item_tokens = self._estimate_tokens(texts.texts[i])
+            candidate = (
+                min(union[0], rect[0]), min(union[1], rect[1]), max(union[2], rect[2]), max(union[3], rect[3])
+            )
+            column_overlap = min(prev_rect[2], rect[2]) - max(prev_rect[0], rect[0])
+            joins = (
+                label in labels and label == texts.labels[previous]
+                and column_overlap >= 0.5 * min(prev_rect[2] - prev_rect[0], rect[2] - rect[0])
+                and -2.0 <= rect[1] - prev_rect[3] <= max_gap
+                and tokens + item_tokens <= budget
             )
+            if joins:
+                members = set(groups[-1]) | {i}
+                joins = not any(
+                    other not in members and intersection_area(candidate, index.rects[other]) > 0
+                    for other in index.query(candidate)
+                )
+            if joins:
+                groups[-1].append(i)
+                union, tokens = candidate, tokens + item_tokens
+            else:
+                groups.append([i])
+                union, tokens = rect, item_tokens
+        if len(groups) == len(texts):
+            return
+
+        merged_texts, merged_labels, merged_rects = [], [], []
+        for group in groups:
+            merged_texts.append("\n".join(texts.texts[i].strip() for i in group if texts.texts[i].strip()))
+            merged_labels.append(texts.labels[group[0]])
+            merged_rects.append((
+                min(rects[i][0] for i in group), min(rects[i][1] for i in group),
+                max(rects[i][2] for i in group), max(rects[i][3] for i in group)
+            ))
+        page_layout.texts = Elements.from_rects(merged_texts, merged_labels, merged_rects, page_layout.page_no)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough token count of a segment (about four characters per token)"""
+        return len(text) // 4 + 1
+
+    def _rewrite_pages(
+        self,
+        doc: fitz.Document,
+        layout: DocumentLayout,
+        translation_map: Dict[str, str],
+        include_tbl: bool,
+        ocg_xref: int
+    ) -> None:
+        """Replace each translated element on the pages in place: redact the source text and insert the translation"""
+        with (
+            tracer.start_span("pdf.rewrite", pages=len(doc), segments=len(translation_map)) as rewrite_span,
+            TextBoxRenderer(settings.PDF_TEXT_RENDER_MODE, settings.PDF_TEXT_LAYOUT_CACHE_SIZE) as renderer
+        ):
+            for page in doc:
+                page_no = page.number + 1
+                hot_path_logger.info("document.page", f"Processing page {page_no}")
+
+                page_layout = layout.get(page_no)
+                if page_layout is None:
+                    continue
+
+                # Apply translated text elements, then table cells if requested
+                elements = [("text", page_layout.texts)]
+                if include_tbl:
+                    elements += [("table", table.cells) for table in page_layout.tables]
+                targets = []
+                for element_type, group in elements:
+                    for text_content, rect in zip(group.texts, group.rects()):
+                        if text_content.strip() and text_content in translation_map:
+                            targets.append((element_type, rect, translation_map[text_content]))
+                        elif text_content.strip():
+                            app_logger.warning(f"Translation missing for {element_type} text: '{text_content[:50]}...'")
+
+                # Redact all elements before inserting any translation and apply the redactions once:
+                # applying them per element was slow and erased translations inserted for overlapping elements
+                redaction_start_time = time.perf_counter()
+                redacted = GridIndex()
+                for element_type, rect, _ in targets:
+                    rect = normalize(rect)
+                    if any(contains(redacted.rects[r], rect) for r in redacted.query(rect)):
+                        rewrite_span.add_attribute("redactions_skipped", 1)
+                        continue
+                    try:
+                        page.add_redact_annot(fitz.Rect(rect), text="")
+                        redacted.insert(rect)
+                    except Exception as e:
+                        app_logger.error(f"Error redacting {element_type} element on page {page_no}: {str(e)}")
+                if redacted.rects:
+                    page.apply_redactions()
 
-        # Process text elements
-        for text_data in doc["texts"]:
-            prov = text_data.get("prov", [{}])[0]
-            text_label = text_data["label"]
-            text_text = text_data["text"]
-            text_page_no = prov["page_no"]
-            text_bbox = prov["bbox"]
-            text_bbox["t"] = redoc["Pages"][str(text_page_no)]["Page_Size"]["height"] - text_bbox["t"]
-            text_bbox["b"] = redoc["Pages"][str(text_page_no)]["Page_Size"]["height"] - text_bbox["b"]
-            redoc["Pages"][str(text_page_no)]["Texts"].append({
-                "label": text_label,
-                "text": text_text,
-                "bbox": text_bbox,
-            })
-
-        # Process table elements
-        if doc["tables"]:
-            for table_data in doc["tables"]:
-                prov = table_data.get("prov", [{}])[0]
-                table_page_no = prov["page_no"]
-                table_bbox = prov["bbox"]
-                table_bbox["t"] = redoc["Pages"][str(table_page_no)]["Page_Size"]["height"] - table_bbox["t"]
-                table_bbox["b"] = redoc["Pages"][str(table_page_no)]["Page_Size"]["height"] - table_bbox["b"]
-                table_cell_list = []
-                
-                for table_cell in table_data["data"]["table_cells"]:
+                insert_start_time = time.perf_counter()
+                for element_type, rect, translated_text in targets:
                     try:
-                        if "bbox" not in table_cell:
-                            app_logger.warning(f"Missing 'bbox' for table cell: {table_cell}")
-                            continue
-                        
-                        table_cell["bbox"]["t"] = redoc["Pages"][str(table_page_no)]["Page_Size"]["height"] - table_cell["bbox"]["t"]
-                        table_cell["bbox"]["b"] = redoc["Pages"][str(table_page_no)]["Page_Size"]["height"] - table_cell["bbox"]["b"]
-                        table_cell_list.append({"text": table_cell["text"], "bbox": table_cell["bbox"]})
+                        if not renderer.insert(page, fitz.Rect(rect), translated_text, oc=ocg_xref):
+                            app_logger.warning(f"Translation did not fit {element_type} box on page {page_no}")
                     except Exception as e:
-                        app_logger.error(f"Exception in table cell processing: {str(e)}")
+                        app_logger.error(f"Error processing {element_type} element on page {page_no}: {str(e)}")
+                        continue
+                rewrite_span.add_attribute("redaction_seconds", insert_start_time - redaction_start_time)
+                rewrite_span.add_attribute("insert_seconds", time.perf_counter() - insert_start_time)
 
-                redoc["Pages"][str(table_page_no)]["Tables"].append({
-                    "table_cells": table_cell_list,
-                    "bbox": table_bbox
-                })
-        
-        return redoc
+                page.clean_contents()
 
-    def _reformat_bbox(self, docling_bbox: Dict[str, float]) -> tuple:
-        """Reformat bounding box coordinates from Docling format"""
-        try:
-            # Safely convert coordinates, handling large integers
-            left = float(docling_bbox.get('l', 0))
-            top = float(docling_bbox.get('t', 0))
-            right = float(docling_bbox.get('r', 0))
-            bottom = float(docling_bbox.get('b', 0))
-
-            # Clamp to reasonable PDF coordinate bounds
-            max_coord = 99999.0
-            left = max(-max_coord, min(max_coord, left))
-            top = max(-max_coord, min(max_coord, top))
-            right = max(-max_coord, min(max_coord, right))
-            bottom = max(-max_coord, min(max_coord, bottom))
-
-            return (left, top, right, bottom)
-        except (ValueError, OverflowError) as e:
-            app_logger.warning(f"Invalid bbox coordinates, using default: {e}")
-            return (0.0, 0.0, 100.0, 100.0)
\ No newline at end of file
+            for path, count in renderer.counts.items():
+                rewrite_span.set_attribute(f"inserts_{path}", count)
+                metrics.pdf_text_inserts.inc(count, path=path)
+
+    def _compress_pdf(self, output_path: str) -> bool:
+        """Recompress the images of a saved PDF in place with pypdf; returns False (file untouched) on failure"""
+        # Compress using PdfWriter with memory management
+        app_logger.info("Starting PDF compression")
+        compression_successful = False
+        with tracer.start_span("pdf.compress", input_bytes=os.path.getsize(output_path)) as compression_span:
+            try:
+                writer = PdfWriter(clone_from=output_path)
+
+                # Process images in batches to manage memory
+                page_count = len(writer.pages)
+                compression_span.set_attribute("pages", page_count)
+                app_logger.info(f"Compressing images in {page_count} pages")
+
+                # Make batch size configurable, default to 50
+                batch_size = getattr(settings, 'PDF_COMPRESSION_BATCH_SIZE', 50)
+                for i in range(0, page_count, batch_size):
+                    end_idx = min(i + batch_size, page_count)
+                    app_logger.debug(f"Processing image batch {i+1}-{end_idx}")
+
+                    try:
+                        for page_idx in range(i, end_idx):
+                            page = writer.pages[page_idx]
+                            for img in page.images:
+                                img.replace(img.image, quality=80)
+                    except Exception as batch_error:
+                        app_logger.warning(f"Error in compression batch {i+1}-{end_idx}: {str(batch_error)}")
+                        # Continue with next batch
+                        continue
+
+                    # Force garbage collection between batches
+                    gc.collect()
+
+                # Write compressed PDF
+                with open(output_path, "wb") as f:
+                    writer.write(f)
+
+                compression_successful = True
+                compression_span.set_attribute("output_bytes", os.path.getsize(output_path))
+                app_logger.info("PDF compression completed successfully")
+
+            except Exception as e:
+                app_logger.warning(f"PDF compression failed, using uncompressed version: {str(e)}")
+                compression_successful = False
+
+        return compression_successful
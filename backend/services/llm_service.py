@@ -1,9 +1,11 @@
 import json
+import time
 from typing import List, Dict, Any
 from openai import AsyncOpenAI
 from pydantic import create_model
 from utils.api_client import APIClient
 from utils.logger import app_logger
+from utils import metrics
 from models.schemas import ColumnInfoList, HeaderItem
 
 class LLMService:
@@ -66,7 +68,8 @@ class LLMService:
 
             api_url = url + "/v1"
             client = AsyncOpenAI(base_url=api_url, api_key=authorization)
-            completion = await client.beta.chat.completions.parse(
+            completion = await self._timed_parse(
+                client,
                 model=model_name,
                 messages=messages,
                 response_format=ColumnInfoList,
@@ -119,7 +122,8 @@ class LLMService:
             client = AsyncOpenAI(base_url=api_url, api_key=authorization)
 
             pydantic_model = self._headers_to_pydantic(headers)
-            completion = await client.beta.chat.completions.parse(
+            completion = await self._timed_parse(
+                client,
                 model=model_name,
                 messages=messages,
                 response_format=pydantic_model,
@@ -137,6 +141,23 @@ class LLMService:
             app_logger.error(error_msg)
             return error_msg
 
+    async def _timed_parse(self, client: AsyncOpenAI, **kwargs):
+        """Run a structured-output completion, recording upstream latency metrics"""
+        model = str(kwargs.get("model", ""))
+        status = "error"
+        start = time.perf_counter()
+        metrics.llm_requests_in_flight.inc(model=model)
+        try:
+            completion = await client.beta.chat.completions.parse(**kwargs)
+            status = "200"
+            return completion
+        except Exception as e:
+            status = str(getattr(e, "status_code", "error"))
+            raise
+        finally:
+            metrics.llm_requests_in_flight.dec(model=model)
+            metrics.llm_request_duration.observe(time.perf_counter() - start, model=model, status=status)
+
     def _headers_to_json_schema(self, headers: List[HeaderItem]) -> str:
         """Convert headers to JSON schema"""
         schema = {
@@ -1,6 +1,7 @@
 from typing import Union, List
 from utils.api_client import APIClient
-from utils.logger import app_logger
+from utils.logger import app_logger, hot_path_logger
+from utils import metrics
 
 class TranslationService:
     """Service for handling text translation"""
@@ -51,6 +52,8 @@ class TranslationService:
         batch_size: int = 5
     ) -> List[str]:
         """Translate multiple texts concurrently in batches"""
+        pending = len(texts)
+        metrics.translation_queue_depth.inc(pending)
         try:
             app_logger.info(f"Batch translating {len(texts)} texts from {input_lang} to {output_lang}")
 
@@ -60,7 +63,12 @@ class TranslationService:
                 # Process texts in batches to avoid overwhelming the API
                 for i in range(0, len(texts), batch_size):
                     batch = texts[i:i + batch_size]
-                    app_logger.info(f"Processing batch {i//batch_size + 1}/{(len(texts) + batch_size - 1)//batch_size}")
+                    metrics.translation_queue_depth.dec(len(batch))
+                    pending -= len(batch)
+                    hot_path_logger.info(
+                        "translation.batch",
+                        f"Processing batch {i//batch_size + 1}/{(len(texts) + batch_size - 1)//batch_size}"
+                    )
 
                     # Create translation requests for this batch
                     requests = []
@@ -79,9 +87,16 @@ class TranslationService:
                     # Execute batch requests concurrently
                     batch_responses = await client.post_batch("/v1/chat/completions", requests)
 
-                    # Extract content from responses
+                    # Extract content from responses; failed items carry their exception
                     batch_results = []
                     for response_data in batch_responses:
+                        if isinstance(response_data, BaseException):
+                            if not isinstance(response_data, Exception):
+                                # A cancelled item (asyncio.CancelledError) means the caller was cancelled
+                                raise response_data
+                            app_logger.error(f"Translation request failed: {str(response_data)}")
+                            batch_results.append(f"Translation error: {str(response_data)}")
+                            continue
                         try:
                             content = response_data["choices"][0]["message"]["content"]
                             batch_results.append(content)
@@ -98,4 +113,6 @@ class TranslationService:
             error_msg = f"Batch translation error: {str(e)}"
             app_logger.error(error_msg)
             return [error_msg] * len(texts)
+        finally:
+            metrics.translation_queue_depth.dec(pending)
 
@@ -1,18 +1,73 @@
 import httpx
 import asyncio
-from typing import Dict, Any, List
-from .logger import app_logger
+import random
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Union
+from config.settings import settings
+from .logger import app_logger, hot_path_logger
+from . import metrics
+from .tracing import tracer
+
+# Upstream statuses worth retrying (rate limiting, proxy and overload errors)
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies per model, used to decide when to hedge"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._latencies: Dict[str, deque] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, model: str, q: float, min_samples: int) -> Optional[float]:
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Shared across clients, since services create a short-lived client per call
+latency_tracker = LatencyTracker()
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+
+def _retry_reason(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code)
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return "network"
+
 
 class APIClient:
     """Centralized async API client for external services with connection pooling"""
 
-    def __init__(self, base_url: str, authorization: str, timeout: int = 14400):
+    def __init__(
+        self,
+        base_url: str,
+        authorization: str,
+        timeout: int = 14400,
+        max_retries: Optional[int] = None,
+        hedging: Optional[bool] = None
+    ):
         self.base_url = base_url.rstrip('/')
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {authorization}"
         }
         self.timeout = timeout
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.hedging = settings.LLM_HEDGING_ENABLED if hedging is None else hedging
         self._client = None
 
     async def _get_client(self) -> httpx.AsyncClient:
@@ -27,22 +82,103 @@ class APIClient:
         return self._client
 
     async def post(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Make async POST request to API endpoint"""
+        """Make async POST request to API endpoint, retrying transient failures with jittered backoff"""
+        model = str(data.get("model", ""))
+        attempt = 0
+        while True:
+            try:
+                return await self._post_hedged(endpoint, data)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                metrics.llm_retries.inc(model=model, reason=_retry_reason(e))
+                app_logger.warning(
+                    f"Retrying POST {endpoint} ({attempt}/{self.max_retries}) in {delay:.2f}s after: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header when present"""
+        cap = min(settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_RETRY_BACKOFF_BASE * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = error.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, min(float(retry_after), settings.LLM_RETRY_BACKOFF_MAX))
+        return delay
+
+    async def _post_hedged(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send the request, and a duplicate if the first is slower than the model's recent p95 latency"""
+        model = str(data.get("model", ""))
+        hedge_after = None
+        if self.hedging:
+            hedge_after = latency_tracker.quantile(
+                model, settings.LLM_HEDGE_QUANTILE, settings.LLM_HEDGE_MIN_SAMPLES
+            )
+        if hedge_after is None:
+            return await self._post_once(endpoint, data)
+
+        primary = asyncio.ensure_future(self._post_once(endpoint, data))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            metrics.llm_hedged_requests.inc(model=model)
+            hedge = asyncio.ensure_future(self._post_once(endpoint, data))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.llm_hedge_wins.inc(model=model)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled while waiting, so no request is left running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _post_once(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Make a single async POST request to API endpoint"""
         url = f"{self.base_url}{endpoint}"
+        model = str(data.get("model", ""))
+        status = "error"
+        start = time.perf_counter()
+        metrics.llm_requests_in_flight.inc(model=model)
 
         try:
-            app_logger.info(f"Making async POST request to {url}")
+            hot_path_logger.info("api_client.post", f"Making async POST request to {url}")
             client = await self._get_client()
-            response = await client.post(url, json=data)
+            with tracer.start_span("llm.post", endpoint=endpoint, model=model) as span:
+                response = await client.post(url, json=data)
+                status = str(response.status_code)
+                span.set_attribute("status_code", response.status_code)
+                span.set_attribute("request_bytes", len(response.request.content))
+                span.set_attribute("response_bytes", len(response.content))
 
             if response.status_code == 200:
+                latency_tracker.record(model, time.perf_counter() - start)
                 return response.json()
             else:
                 error_msg = f"Request failed with status code {response.status_code}"
                 app_logger.error(error_msg)
                 raise httpx.HTTPStatusError(error_msg, request=response.request, response=response)
 
+        except asyncio.CancelledError:
+            # Losing side of a hedged request
+            status = "cancelled"
+            raise
         except httpx.TimeoutException:
+            status = "timeout"
             error_msg = "Request timed out"
             app_logger.error(error_msg)
             raise
@@ -54,11 +190,20 @@ class APIClient:
             error_msg = f"Unexpected error: {str(e)}"
             app_logger.error(error_msg)
             raise
+        finally:
+            metrics.llm_requests_in_flight.dec(model=model)
+            metrics.llm_request_duration.observe(time.perf_counter() - start, model=model, status=status)
+
+    async def post_batch(
+        self, endpoint: str, data_list: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """Make multiple async POST requests concurrently.
 
-    async def post_batch(self, endpoint: str, data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Make multiple async POST requests concurrently"""
+        Each request is retried independently; an item that still fails is returned as
+        its exception instead of failing the whole batch.
+        """
         tasks = [self.post(endpoint, data) for data in data_list]
-        return await asyncio.gather(*tasks)
+        return await asyncio.gather(*tasks, return_exceptions=True)
 
     async def close(self):
         """Close the HTTP client"""
@@ -69,4 +214,4 @@ class APIClient:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
\ No newline at end of file
+        await self.close()
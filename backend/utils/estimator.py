@@ -0,0 +1,219 @@
+import os
+import sqlite3
+import threading
+import time
+from statistics import median
+from typing import Any, Dict, List, Optional
+import fitz
+import numpy as np
+from config.settings import settings
+from .logger import app_logger
+
+# Pages with less extractable text than this but with images are counted as scanned (need OCR).
+# The frontend's get_pdf_info copies this value; change both together.
+SCANNED_PAGE_MAX_CHARS = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    finished_at REAL NOT NULL,
+    model TEXT NOT NULL,
+    include_tables INTEGER NOT NULL,
+    pages INTEGER NOT NULL,
+    scanned_page_ratio REAL NOT NULL,
+    text_blocks INTEGER NOT NULL,
+    file_mb REAL NOT NULL,
+    segments INTEGER,
+    table_cells INTEGER,
+    upstream_latency REAL,
+    duration_seconds REAL NOT NULL
+)
+"""
+
+_COLUMNS = (
+    "model", "include_tables", "pages", "scanned_page_ratio", "text_blocks", "file_mb",
+    "segments", "table_cells", "upstream_latency", "duration_seconds"
+)
+
+
+def pdf_quick_features(pdf: Any) -> Dict[str, Any]:
+    """Features that can be read from a PDF in well under a second per hundred pages.
+
+    `pdf` is a file path or the PDF bytes. This is the reference definition of the
+    estimator's input features: the frontend's `get_pdf_info`
+    (frontend/app_pages/translatePDF.py) computes them before a job starts and must
+    mirror this function and SCANNED_PAGE_MAX_CHARS.
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        doc, file_mb = fitz.open("pdf", pdf), len(pdf) / (1024 * 1024)
+    else:
+        doc, file_mb = fitz.open(pdf), os.path.getsize(pdf) / (1024 * 1024)
+    with doc:
+        scanned_pages = 0
+        text_blocks = 0
+        for page in doc:
+            blocks = [block for block in page.get_text("blocks") if block[6] == 0]
+            text_blocks += len(blocks)
+            if sum(len(block[4].strip()) for block in blocks) < SCANNED_PAGE_MAX_CHARS and page.get_images():
+                scanned_pages += 1
+        pages = len(doc)
+    return {
+        "pages": pages,
+        "scanned_page_ratio": scanned_pages / pages if pages else 0.0,
+        "text_blocks": text_blocks,
+        "file_mb": file_mb,
+    }
+
+
+class JobEstimator:
+    """Records finished PDF jobs in a local SQLite store and predicts the duration of new ones.
+
+    Duration is fitted by least squares on features known before a job starts:
+    pages, scanned pages (OCR), text blocks weighted by the model's upstream latency,
+    table pages and file size. The fit is recomputed lazily after new jobs are recorded.
+
+    Segment and table cell counts are only known once a job has run, so they are not
+    used in the fit; they are recorded for later analysis of the model's features.
+    """
+
+    def __init__(self, db_path: str, min_samples: int = 8, max_samples: int = 500):
+        self.db_path = db_path
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._initialised = False
+        self._fit: Optional[Dict[str, Any]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialised:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=5)
+        if not self._initialised:
+            connection.execute(_SCHEMA)
+            self._initialised = True
+        return connection
+
+    def record_job(
+        self,
+        features: Dict[str, Any],
+        model: str,
+        include_tables: bool,
+        duration_seconds: float,
+        segments: Optional[int] = None,
+        table_cells: Optional[int] = None,
+        upstream_latency: Optional[float] = None
+    ) -> None:
+        row = (
+            model, int(include_tables), features["pages"], features["scanned_page_ratio"],
+            features["text_blocks"], features["file_mb"], segments, table_cells, upstream_latency, duration_seconds
+        )
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute(
+                        f"INSERT INTO pdf_jobs (finished_at, {', '.join(_COLUMNS)}) VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                        (time.time(), *row)
+                    )
+            finally:
+                connection.close()
+            self._fit = None
+
+    def _load_jobs(self) -> List[Dict[str, Any]]:
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM pdf_jobs ORDER BY id DESC LIMIT ?", (self.max_samples,)
+            ).fetchall()
+        finally:
+            connection.close()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    @staticmethod
+    def _design_row(
+        pages: float, scanned_page_ratio: float, text_blocks: float, file_mb: float,
+        include_tables: bool, upstream_latency: float
+    ) -> List[float]:
+        return [
+            1.0,
+            pages,
+            pages * scanned_page_ratio,
+            text_blocks * upstream_latency,
+            pages if include_tables else 0.0,
+            file_mb,
+        ]
+
+    def _get_fit(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._fit is not None:
+                return self._fit
+            jobs = self._load_jobs()
+            if len(jobs) < self.min_samples:
+                return None
+
+            # Typical upstream latency per model, used when a job did not record one
+            latencies: Dict[str, List[float]] = {}
+            for job in jobs:
+                if job["upstream_latency"]:
+                    latencies.setdefault(job["model"], []).append(job["upstream_latency"])
+            all_latencies = [latency for values in latencies.values() for latency in values]
+            default_latency = median(all_latencies) if all_latencies else 1.0
+            model_latency = {model: median(values) for model, values in latencies.items()}
+
+            X = np.array([
+                self._design_row(
+                    job["pages"], job["scanned_page_ratio"], job["text_blocks"], job["file_mb"], job["include_tables"],
+                    job["upstream_latency"] or model_latency.get(job["model"], default_latency)
+                )
+                for job in jobs
+            ])
+            y = np.array([job["duration_seconds"] for job in jobs])
+            coefficients, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+            residuals = y - X @ coefficients
+            self._fit = {
+                "coefficients": coefficients,
+                "samples": len(jobs),
+                "rmse": float(np.sqrt(np.mean(residuals ** 2))),
+                "model_latency": model_latency,
+                "default_latency": default_latency,
+            }
+            app_logger.info(f"Fitted PDF job duration model on {len(jobs)} jobs (RMSE {self._fit['rmse']:.1f}s)")
+            return self._fit
+
+    def estimate(
+        self,
+        pages: int,
+        scanned_page_ratio: float,
+        text_blocks: int,
+        file_mb: float,
+        include_tables: bool,
+        model: str,
+        upstream_latency: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Predicted duration in seconds, or None while fewer than `min_samples` jobs are recorded"""
+        fit = self._get_fit()
+        if fit is None:
+            return {"estimated_seconds": None, "error_seconds": None, "samples": self._count_jobs()}
+        if upstream_latency is None:
+            upstream_latency = fit["model_latency"].get(model, fit["default_latency"])
+        row = np.array(self._design_row(pages, scanned_page_ratio, text_blocks, file_mb, include_tables, upstream_latency))
+        # Few or unusual samples can give a negative intercept; never promise less than a second
+        estimated_seconds = max(1.0, float(row @ fit["coefficients"]))
+        return {"estimated_seconds": estimated_seconds, "error_seconds": fit["rmse"], "samples": fit["samples"]}
+
+    def _count_jobs(self) -> int:
+        with self._lock:
+            connection = self._connect()
+            try:
+                return connection.execute("SELECT COUNT(*) FROM pdf_jobs").fetchone()[0]
+            finally:
+                connection.close()
+
+
+job_estimator = JobEstimator(
+    settings.ESTIMATOR_DB_PATH,
+    min_samples=settings.ESTIMATOR_MIN_SAMPLES,
+    max_samples=settings.ESTIMATOR_MAX_SAMPLES
+)
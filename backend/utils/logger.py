@@ -1,20 +1,178 @@
+import atexit
+import contextvars
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+
+# Correlation ids attached to every record logged within a request / job
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+job_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("job_id", default="")
+
+
+class ContextFilter(logging.Filter):
+    """Copy request/job ids from the caller's context onto the record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.job_id = job_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", ""):
+            entry["request_id"] = record.request_id
+        if getattr(record, "job_id", ""):
+            entry["job_id"] = record.job_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text format, with correlation ids appended when present"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        ids = [f"{key}={getattr(record, key, '')}" for key in ("request_id", "job_id") if getattr(record, key, "")]
+        return f"{message} [{' '.join(ids)}]" if ids else message
+
+
+class _LocalQueueHandler(QueueHandler):
+    """Enqueue records without formatting them on the calling thread.
+
+    The queue is in-process, so records do not need to be made picklable; only the
+    message is resolved up front in case its arguments are mutated later.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Single background listener shared by all loggers, so stdout writes happen off the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+_listener.start()
+_listener_running = True
+
+
+# Rate-limited loggers whose pending suppression counts are reported before the listener stops
+_rate_limited_loggers: List["RateLimitedLogger"] = []
+
+
+def stop_logging() -> None:
+    """Report pending suppression counts, flush queued records and stop the background listener"""
+    global _listener_running
+    if _listener_running:
+        for rate_limited_logger in _rate_limited_loggers:
+            rate_limited_logger.stop()
+        _listener_running = False
+        _listener.stop()
+
+
+atexit.register(stop_logging)
+
 
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
-    """Setup logger with consistent formatting"""
+    """Setup logger that hands records to the background logging thread"""
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
+        handler = _LocalQueueHandler(_log_queue)
+        handler.addFilter(ContextFilter())
         logger.addHandler(handler)
-    
+        logger.propagate = False
+
     return logger
 
+
+class RateLimitedLogger:
+    """Log hot-path messages at most once per interval per key, reporting how many were suppressed.
+
+    Suppressed messages are counted in the next message that gets through or, if none
+    follows, in a summary record logged once the interval has passed (by a background
+    thread started on the first suppression) or when logging stops.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float):
+        self.logger = logger
+        self.interval = interval
+        # key -> (time of the last record logged, suppressed count, level and text of the last suppressed message)
+        self._state: Dict[str, Tuple[float, int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        _rate_limited_loggers.append(self)
+
+    def log(self, level: int, key: str, message: str) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            last_time, suppressed, _, _ = self._state.get(key, (float("-inf"), 0, level, ""))
+            if now - last_time < self.interval:
+                self._state[key] = (last_time, suppressed + 1, level, message)
+                if self._flusher is None and not self._stopped.is_set():
+                    self._flusher = threading.Thread(target=self._run_flusher, name="log-suppression-flusher", daemon=True)
+                    self._flusher.start()
+                return
+            self._state[key] = (now, 0, level, message)
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        self.logger.log(level, message)
+
+    def flush(self, force: bool = False) -> None:
+        """Log a summary for keys with suppressed messages whose interval has passed (every such key if `force`)"""
+        now = time.monotonic()
+        pending = []
+        with self._lock:
+            for key, (last_time, suppressed, level, message) in self._state.items():
+                if suppressed and (force or now - last_time >= self.interval):
+                    pending.append((level, suppressed, message))
+                    self._state[key] = (now, 0, level, message)
+        for level, suppressed, message in pending:
+            self.logger.log(level, f"{suppressed} similar messages suppressed, last: {message}")
+
+    def stop(self) -> None:
+        """Stop the background flusher and report all pending suppression counts"""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush(force=True)
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def info(self, key: str, message: str) -> None:
+        self.log(logging.INFO, key, message)
+
+    def debug(self, key: str, message: str) -> None:
+        self.log(logging.DEBUG, key, message)
+
+
 # Create application logger
-app_logger = setup_logger("digitalisation_toolkit")
\ No newline at end of file
+app_logger = setup_logger("digitalisation_toolkit", settings.LOG_LEVEL)
+hot_path_logger = RateLimitedLogger(app_logger, settings.LOG_SAMPLE_INTERVAL_SECONDS)
@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+from .logger import app_logger
+
+
+class SamplingProfiler:
+    """Periodically sample the stack of one thread and aggregate it into collapsed stacks.
+
+    The output uses the "folded" format (`frame;frame;frame count`) understood by
+    flamegraph.pl, speedscope and inferno. Sampling runs in a daemon thread, so the
+    profiled code is not instrumented and pays only for the GIL hand-offs.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _start_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def write_allocation_snapshot(path: str, top: int = 25) -> None:
+    """Write the top allocation sites of the current tracemalloc snapshot"""
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Current traced memory: {current / 1024**2:.1f} MiB, peak: {peak / 1024**2:.1f} MiB\n\n")
+        for index, stat in enumerate(snapshot.statistics("lineno")[:top], 1):
+            frame = stat.traceback[0]
+            f.write(f"#{index}: {frame.filename}:{frame.lineno} {stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+
+
+@contextmanager
+def profile_job(job_id: str, directory: str, interval: float = 0.005, top_allocations: int = 25):
+    """Profile the enclosed block and write `profile.folded` and `allocations.txt` to `<directory>/<job_id>/`.
+
+    Only the calling thread is sampled; other requests served by the same event loop
+    while the job runs will also show up in the profile.
+    """
+    job_dir = os.path.join(directory, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    profiler = SamplingProfiler(interval=interval)
+    _start_tracemalloc()
+    profiler.start()
+    start_time = time.perf_counter()
+    app_logger.info(f"Profiling job {job_id}")
+    try:
+        yield job_dir
+    finally:
+        profiler.stop()
+        try:
+            profiler.write_folded(os.path.join(job_dir, "profile.folded"))
+            write_allocation_snapshot(os.path.join(job_dir, "allocations.txt"), top_allocations)
+            app_logger.info(
+                f"Profile for job {job_id} written to {job_dir} "
+                f"({sum(profiler.samples.values())} samples over {time.perf_counter() - start_time:.2f}s)"
+            )
+        except Exception as e:
+            app_logger.error(f"Failed to write profile for job {job_id}: {str(e)}")
+        finally:
+            _stop_tracemalloc()
@@ -0,0 +1,89 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Rect = Tuple[float, float, float, float]
+
+# Rectangles spanning more grid cells than this (e.g. clamped, page-sized boxes) are kept
+# in a separate list that every query checks, rather than in thousands of cells
+MAX_CELLS_PER_RECT = 1024
+
+
+def normalize(rect: Sequence[float]) -> Rect:
+    left, top, right, bottom = rect
+    return min(left, right), min(top, bottom), max(left, right), max(top, bottom)
+
+
+def area(rect: Rect) -> float:
+    return max(0.0, rect[2] - rect[0]) * max(0.0, rect[3] - rect[1])
+
+
+def intersection_area(a: Rect, b: Rect) -> float:
+    return max(0.0, min(a[2], b[2]) - max(a[0], b[0])) * max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+
+
+def contains(outer: Rect, inner: Rect, tolerance: float = 0.0) -> bool:
+    return (
+        inner[0] >= outer[0] - tolerance and inner[1] >= outer[1] - tolerance
+        and inner[2] <= outer[2] + tolerance and inner[3] <= outer[3] + tolerance
+    )
+
+
+class GridIndex:
+    """Uniform grid over rectangles (in PDF points) for finding those that touch a query rectangle.
+
+    A page holds at most a few hundred elements of similar size, for which bucketing by
+    a fixed cell size answers neighbourhood queries in near constant time without the
+    bookkeeping of an R-tree.
+    """
+
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = cell_size
+        self.rects: List[Rect] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._oversized: List[int] = []
+
+    @classmethod
+    def from_rects(cls, rects: Iterable[Sequence[float]], cell_size: float = 64.0) -> "GridIndex":
+        index = cls(cell_size)
+        for rect in rects:
+            index.insert(rect)
+        return index
+
+    def _cell_ranges(self, rect: Rect) -> Tuple[range, range]:
+        size = self.cell_size
+        return (
+            range(math.floor(rect[0] / size), math.floor(rect[2] / size) + 1),
+            range(math.floor(rect[1] / size), math.floor(rect[3] / size) + 1),
+        )
+
+    def insert(self, rect: Sequence[float]) -> int:
+        """Add a rectangle and return its id (its position in insertion order)"""
+        rect = normalize(rect)
+        rect_id = len(self.rects)
+        self.rects.append(rect)
+        columns, rows = self._cell_ranges(rect)
+        if len(columns) * len(rows) > MAX_CELLS_PER_RECT:
+            self._oversized.append(rect_id)
+            return rect_id
+        for column in columns:
+            for row in rows:
+                self._cells[(column, row)].append(rect_id)
+        return rect_id
+
+    def query(self, rect: Sequence[float]) -> List[int]:
+        """Ids of the rectangles intersecting or touching `rect`, in insertion order"""
+        rect = normalize(rect)
+        columns, rows = self._cell_ranges(rect)
+        if len(columns) * len(rows) > MAX_CELLS_PER_RECT:
+            candidates = set(range(len(self.rects)))
+        else:
+            candidates = set(self._oversized)
+            for column in columns:
+                for row in rows:
+                    candidates.update(self._cells.get((column, row), ()))
+        return sorted(
+            rect_id for rect_id in candidates
+            if self.rects[rect_id][0] <= rect[2] and self.rects[rect_id][2] >= rect[0]
+            and self.rects[rect_id][1] <= rect[3] and self.rects[rect_id][3] >= rect[1]
+        )
@@ -0,0 +1,103 @@
+import html
+from typing import Dict, Tuple
+import fitz
+
+# MuPDF lays out HTML text at 12pt before scaling it down to fit, so plain text starts there too
+MAX_FONT_SIZE = 12.0
+# Below this size a one-line label is left to the HTML path, which can wrap it instead
+MIN_PLAIN_FONT_SIZE = 4.0
+# Box height insert_textbox needs for one line of Helvetica, relative to the font size
+PLAIN_LINE_HEIGHT = 1.7
+PLAIN_FONT = "helv"
+
+DEFAULT_CSS = "body {margin: 1px; font-family: sans-serif;}"
+
+TEXT_RENDER_MODES = ("html", "auto")
+
+
+class TextBoxRenderer:
+    """Writes translated text into page rectangles of one document.
+
+    HTML boxes are laid out with a Story sharing one CSS string and Archive, and
+    each laid-out box is kept until the job ends as a one-page PDF keyed by (text,
+    box size, CSS), for up to `cache_size` boxes (later ones go through insert_htmlbox):
+    a repeated header or cell is shown again from the cache, which also lets
+    PyMuPDF reuse the same form XObject in the output. In "auto" mode, text that
+    fits on one line in Helvetica is written with insert_textbox instead, which
+    skips the HTML engine altogether.
+    """
+
+    def __init__(self, mode: str = "html", cache_size: int = 2048, css: str = DEFAULT_CSS):
+        if mode not in TEXT_RENDER_MODES:
+            raise ValueError(f"Unknown text render mode '{mode}', expected one of {', '.join(TEXT_RENDER_MODES)}")
+        self.mode = mode
+        self.cache_size = cache_size
+        self.css = css
+        self.archive = fitz.Archive()
+        self._cache: Dict[Tuple[str, float, float, str], fitz.Document] = {}
+        self.counts = {"cached": 0, "html": 0, "plain": 0}
+
+    def __enter__(self) -> "TextBoxRenderer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for rendered in self._cache.values():
+            rendered.close()
+        self._cache.clear()
+
+    def insert(self, page: fitz.Page, rect: fitz.Rect, text: str, oc: int = 0) -> bool:
+        """Write `text` into `rect` on `page`; returns False if it could not be fitted"""
+        if self.mode == "auto" and self._insert_plain(page, rect, text, oc):
+            self.counts["plain"] += 1
+            return True
+
+        key = (text, round(rect.width, 2), round(rect.height, 2), self.css)
+        rendered = self._cache.get(key)
+        if rendered is not None:
+            self.counts["cached"] += 1
+        elif len(self._cache) < self.cache_size:
+            rendered = self._layout_html(text, rect.width, rect.height)
+            if rendered is None:
+                return False
+            self.counts["html"] += 1
+            # Cached documents stay open until the job ends: the output page's graft map refers to
+            # its source document, so a laid-out box is never dropped after being shown
+            self._cache[key] = rendered
+        else:
+            # Cache full: let insert_htmlbox lay out and show the box without keeping it
+            spare_height, _ = page.insert_htmlbox(
+                rect, self._html(text), css=self.css, archive=self.archive, oc=oc
+            )
+            if spare_height < 0:
+                return False
+            self.counts["html"] += 1
+            return True
+        page.show_pdf_page(rect, rendered, 0, oc=oc)
+        return True
+
+    @staticmethod
+    def _html(text: str) -> str:
+        return f"<div>{html.escape(text).replace(chr(10), '<br>')}</div>"
+
+    def _layout_html(self, text: str, width: float, height: float):
+        """Lay out `text` scaled down to fit a width x height box, as a one-page PDF (None if it never fits)"""
+        story = fitz.Story(html=self._html(text), user_css=self.css, archive=self.archive)
+        fit = story.fit_scale(fitz.Rect(0, 0, width, height), scale_min=1)
+        if not fit.big_enough:
+            return None
+        return story.write_with_links(lambda *args: (fit.rect, fit.rect, fitz.Identity))
+
+    def _insert_plain(self, page: fitz.Page, rect: fitz.Rect, text: str, oc: int) -> bool:
+        """Write a one-line, Latin-1 `text` with a base-14 font; False (nothing written) if it is not that simple"""
+        if not text or "\n" in text or max(map(ord, text)) > 255:
+            return False
+        text_length = fitz.get_text_length(text, fontname=PLAIN_FONT, fontsize=1)
+        if text_length <= 0:
+            return False
+        font_size = min(MAX_FONT_SIZE, (rect.width - 2) / text_length, rect.height / PLAIN_LINE_HEIGHT)
+        if font_size < MIN_PLAIN_FONT_SIZE:
+            return False
+        return page.insert_textbox(rect, text, fontname=PLAIN_FONT, fontsize=font_size, oc=oc) >= 0
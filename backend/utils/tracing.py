@@ -0,0 +1,265 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from .logger import app_logger
+
+SERVICE_NAME = "digitalisation-toolkit"
+SCOPE_NAME = "digitalisation_toolkit"
+
+# OTLP enum names for the span status and kind
+_STATUS_CODES = {"OK": "STATUS_CODE_OK", "ERROR": "STATUS_CODE_ERROR"}
+SPAN_KIND_INTERNAL = "SPAN_KIND_INTERNAL"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """An OTLP/JSON AnyValue; 64-bit integers are encoded as strings, as the protobuf JSON mapping requires"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def otlp_request(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap serialised spans in an OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}],
+        }]
+    }
+
+
+class Span:
+    """A timed operation, serialised as an OTLP/JSON span so exported files can be ingested by OpenTelemetry tooling"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_attribute(self, key: str, amount: float) -> None:
+        """Accumulate a numeric attribute (e.g. time spent in a repeated sub-step)"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_seconds(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": otlp_attributes(self.attributes),
+            "status": {"code": _STATUS_CODES[self.status], "message": self.error or ""},
+        }
+
+
+class ConsoleSpanExporter:
+    """Write finished spans to the application log"""
+
+    def export(self, span: Span) -> None:
+        app_logger.info(f"span {json.dumps(span.to_dict(), default=str)}")
+
+
+class FileSpanExporter:
+    """Append finished spans to a JSON-lines file, one OTLP/JSON ExportTraceServiceRequest per line.
+
+    Spans are queued and written by a background thread, so the event loop never blocks
+    on file I/O; each line holds the spans finished since the previous write.
+    """
+
+    MAX_BATCH = 512
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def shutdown(self) -> None:
+        """Write the queued spans and stop the background thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item.to_dict())
+                if len(batch) >= self.MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._file.write(json.dumps(otlp_request(batch), default=str) + "\n")
+                    self._file.flush()
+                except Exception as e:
+                    app_logger.warning(f"Failed to write {len(batch)} spans to {self.path}: {str(e)}")
+        self._file.close()
+
+
+class Tracer:
+    """Lightweight in-process tracer with context propagation across asyncio tasks"""
+
+    def __init__(self, enabled: bool = True, exporter=None):
+        self.enabled = enabled
+        self.exporter = exporter
+        # Finished spans per trace, kept only while a timeline has been requested
+        self._timelines: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def start_span(self, name: str, **attributes: Any):
+        """Start a child of the current span (or a new trace) for the duration of the block"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "ERROR"
+            span.error = str(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            self._finish(span)
+
+    def current_span(self) -> "Span":
+        return _current_span.get() or _NOOP_SPAN
+
+    def record_timeline(self, trace_id: str) -> None:
+        """Keep finished spans of a trace in memory so a timeline can be dumped later"""
+        if self.enabled:
+            with self._lock:
+                self._timelines.setdefault(trace_id, [])
+
+    def pop_timeline(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Return the spans recorded for a trace ordered by start time, and stop recording it"""
+        with self._lock:
+            spans = self._timelines.pop(trace_id, [])
+        spans.sort(key=lambda span: span.start_ns)
+        return [span.to_dict() for span in spans]
+
+    def dump_timeline(self, trace_id: str, directory: str) -> Optional[str]:
+        """Write the spans of a trace, ordered by start time, to `<directory>/<trace_id>.timeline.json` as an OTLP/JSON request"""
+        spans = self.pop_timeline(trace_id)
+        if not spans:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{trace_id}.timeline.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(otlp_request(spans), f, indent=2, default=str)
+        return path
+
+    def shutdown(self) -> None:
+        """Flush spans still queued by the exporter"""
+        shutdown = getattr(self.exporter, "shutdown", None)
+        if shutdown is not None:
+            shutdown()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            timeline = self._timelines.get(span.trace_id)
+            if timeline is not None:
+                timeline.append(span)
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except Exception as e:
+                app_logger.warning(f"Failed to export span '{span.name}': {str(e)}")
+
+
+class _NoopSpan:
+    """Stand-in returned when tracing is disabled so call sites need no checks"""
+
+    trace_id = ""
+    span_id = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_attribute(self, key: str, amount: float) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _build_exporter(name: str, file_path: str):
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(file_path)
+    return None
+
+
+def setup_tracer() -> Tracer:
+    """Create the application tracer from settings"""
+    return Tracer(
+        enabled=settings.TRACING_ENABLED,
+        exporter=_build_exporter(settings.TRACING_EXPORTER, settings.TRACING_FILE_PATH),
+    )
+
+
+# Create application tracer
+tracer = setup_tracer()
+atexit.register(tracer.shutdown)
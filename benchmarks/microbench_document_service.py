@@ -0,0 +1,285 @@
+"""Microbenchmarks for the DocumentService stages that run outside Docling inference.
+
+Each stage gets synthetic input of a configurable size and is timed in isolation:
+
+- `build_layout`: `layout_from_docling`, walking a Docling document into the page layout
+- `prepare_layout`: `_prepare_layout`, dropping texts inside tables and merging line fragments
+- `rewrite`: `_rewrite_pages`, redacting and inserting translated text with PyMuPDF
+- `compress`: `_compress_pdf`, the pypdf image recompression pass
+
+Stages are timed `--repeat` times, then run once more under `tracemalloc` to record
+the peak of Python allocations (MuPDF's own C allocations are not traced), so the
+tracing overhead does not distort the timings.
+
+    python benchmarks/microbench_document_service.py --pages 50 --texts-per-page 30 --output micro.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import fitz
+from docling_core.types.doc import (
+    BoundingBox, CoordOrigin, DocItemLabel, DoclingDocument, ProvenanceItem, Size, TableCell, TableData
+)
+
+from run_benchmarks import BACKEND_DIR, git_commit
+
+STAGES = ("build_layout", "prepare_layout", "rewrite", "compress")
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 40
+
+
+def _bbox(left: float, top: float, right: float, bottom: float) -> BoundingBox:
+    """A Docling provenance bbox: bottom-left origin, so `t` is larger than `b`"""
+    return BoundingBox(
+        l=left, t=PAGE_HEIGHT - top, r=right, b=PAGE_HEIGHT - bottom, coord_origin=CoordOrigin.BOTTOMLEFT
+    )
+
+
+def synthetic_layout(
+    pages: int, texts_per_page: int, tables_per_page: int, cells_per_table: int,
+    fragments_per_line: int = 1, texts_in_tables: int = 0
+) -> List[Dict[str, Any]]:
+    """Element positions per page: texts stacked in the top half, tables in the bottom half.
+
+    Each text line can be split into side-by-side fragments, and tables can repeat some
+    of their cells as text items, as Docling output often does.
+    """
+    layout = []
+    text_height = (PAGE_HEIGHT / 2 - MARGIN) / max(1, texts_per_page)
+    table_height = (PAGE_HEIGHT / 2 - MARGIN) / max(1, tables_per_page)
+    columns = max(1, min(5, cells_per_table))
+    rows = max(1, -(-cells_per_table // columns))
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    for page_no in range(1, pages + 1):
+        texts = []
+        fragment_width = (PAGE_WIDTH - 2 * MARGIN) / fragments_per_line
+        for index in range(texts_per_page):
+            top, bottom = MARGIN + index * text_height, MARGIN + (index + 1) * text_height
+            for fragment in range(fragments_per_line):
+                left = MARGIN + fragment * fragment_width
+                texts.append((
+                    f"Line {index} part {fragment} on page {page_no} about the scanned records.",
+                    (left, top, left + fragment_width - 2, bottom)
+                ))
+        tables = []
+        for table in range(tables_per_page):
+            top = PAGE_HEIGHT / 2 + table * table_height
+            cell_height = table_height / rows
+            cells = [
+                (f"Cell {cell} of table {table}",
+                 (MARGIN + (cell % columns) * cell_width, top + (cell // columns) * cell_height,
+                  MARGIN + (cell % columns + 1) * cell_width, top + (cell // columns + 1) * cell_height))
+                for cell in range(cells_per_table)
+            ]
+            tables.append(((MARGIN, top, PAGE_WIDTH - MARGIN, top + table_height), cells))
+            texts.extend(cells[:texts_in_tables])
+        layout.append({"page_no": page_no, "texts": texts, "tables": tables})
+    return layout
+
+
+def synthetic_document(layout: List[Dict[str, Any]]) -> DoclingDocument:
+    """A Docling document with the layout's texts and tables, as the converter would return it"""
+    document = DoclingDocument(name="microbenchmark")
+    for page in layout:
+        page_no = page["page_no"]
+        document.add_page(page_no=page_no, size=Size(width=PAGE_WIDTH, height=PAGE_HEIGHT))
+        for text, box in page["texts"]:
+            prov = ProvenanceItem(page_no=page_no, bbox=_bbox(*box), charspan=(0, len(text)))
+            document.add_text(label=DocItemLabel.TEXT, text=text, prov=prov)
+        for box, cells in page["tables"]:
+            table_cells = [
+                TableCell(
+                    text=text, bbox=_bbox(*cell_box), row_span=1, col_span=1,
+                    start_row_offset_idx=index, end_row_offset_idx=index + 1,
+                    start_col_offset_idx=0, end_col_offset_idx=1
+                )
+                for index, (text, cell_box) in enumerate(cells)
+            ]
+            document.add_table(
+                data=TableData(num_rows=len(cells), num_cols=1, table_cells=table_cells),
+                prov=ProvenanceItem(page_no=page_no, bbox=_bbox(*box), charspan=(0, 0))
+            )
+    return document
+
+
+def synthetic_pdf(layout: List[Dict[str, Any]], images_per_page: int) -> bytes:
+    """A PDF with the layout's text drawn in place, plus photos for the compression pass"""
+    image = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 400, 300), False)
+    for y in range(0, 300, 10):
+        image.set_rect(fitz.IRect(0, y, 400, y + 10), ((y * 7) % 256, (y * 3) % 256, (y * 5) % 256))
+    with fitz.open() as doc:
+        for page_layout in layout:
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            for text, box in page_layout["texts"]:
+                page.insert_textbox(fitz.Rect(box), text, fontsize=7)
+            for _, cells in page_layout["tables"]:
+                for text, box in cells:
+                    page.draw_rect(fitz.Rect(box), color=(0, 0, 0), width=0.3)
+                    page.insert_textbox(fitz.Rect(box), text, fontsize=6)
+            for index in range(images_per_page):
+                left = MARGIN + index * 60
+                page.insert_image(fitz.Rect(left, PAGE_HEIGHT - MARGIN - 45, left + 60, PAGE_HEIGHT - MARGIN), pixmap=image)
+        return doc.tobytes()
+
+
+def measure(run: Callable[[Any], Any], setup: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Time `run(setup())` `repeat` times (setup untimed), then record its tracemalloc peak once"""
+    timings = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        timings.append(time.perf_counter() - start)
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": {"min": min(timings), "median": statistics.median(timings), "mean": statistics.mean(timings)},
+        "peak_traced_bytes": peak,
+    }
+
+
+def _load_backend():
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(BACKEND_DIR))
+    from models.layout import layout_from_docling
+    from services.document_service import DocumentService
+    return DocumentService(), layout_from_docling
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    service, layout_from_docling = _load_backend()
+    layout = synthetic_layout(
+        args.pages, args.texts_per_page, args.tables_per_page, args.table_cells,
+        args.fragments_per_line, args.texts_in_tables
+    )
+    document = synthetic_document(layout)
+    pdf_bytes = synthetic_pdf(layout, args.images_per_page)
+    page_layout = layout_from_docling(document)
+    service._prepare_layout(page_layout, True)
+    # Translate the prepared segments, as translate_pdf does, so merged items are found in the map
+    segments = [
+        text
+        for prepared in page_layout.values()
+        for text in prepared.texts.texts + [text for table in prepared.tables for text in table.cells.texts]
+    ]
+    translation_map = {text: f"Terjemahan: {text}" for text in segments}
+    elements = sum(len(page["texts"]) + sum(len(cells) for _, cells in page["tables"]) for page in layout)
+
+    def open_pdf():
+        doc = fitz.open("pdf", pdf_bytes)
+        return doc, doc.add_ocg("Benchmark Translation", on=True)
+
+    def rewrite(opened):
+        doc, ocg_xref = opened
+        try:
+            service._rewrite_pages(doc, page_layout, translation_map, True, ocg_xref)
+        finally:
+            doc.close()
+
+    work_dir = tempfile.mkdtemp(prefix="microbench_")
+    pdf_path = os.path.join(work_dir, "input.pdf")
+
+    def write_pdf():
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        return pdf_path
+
+    stages = {
+        "build_layout": (layout_from_docling, lambda: document),
+        "prepare_layout": (lambda built: service._prepare_layout(built, True), lambda: layout_from_docling(document)),
+        "rewrite": (rewrite, open_pdf),
+        "compress": (service._compress_pdf, write_pdf),
+    }
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "options": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "elements": elements,
+        "segments": len(segments),
+        "input_bytes": len(pdf_bytes),
+        "stages": {},
+    }
+    try:
+        for name in args.stages:
+            print(f"Running {name}", file=sys.stderr)
+            stage_run, setup = stages[name]
+            results["stages"][name] = measure(stage_run, setup, args.repeat)
+    finally:
+        if os.path.exists(pdf_path):
+            os.unlink(pdf_path)
+        os.rmdir(work_dir)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Stages whose median time or traced memory peak grew by more than `max_regression`"""
+    regressions = []
+    for name, current in results["stages"].items():
+        previous: Optional[Dict[str, Any]] = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        before, after = previous["seconds"]["median"], current["seconds"]["median"]
+        if before > 0 and after > before * (1 + max_regression):
+            regressions.append(f"{name}: median {before * 1000:.1f}ms -> {after * 1000:.1f}ms")
+        before, after = previous["peak_traced_bytes"], current["peak_traced_bytes"]
+        if before > 0 and after > before * (1 + max_regression):
+            regressions.append(f"{name}: peak memory {before / 2**20:.1f}MiB -> {after / 2**20:.1f}MiB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for DocumentService stages")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--texts-per-page", type=int, default=20)
+    parser.add_argument("--tables-per-page", type=int, default=1)
+    parser.add_argument("--table-cells", type=int, default=20, help="Cells per table")
+    parser.add_argument("--fragments-per-line", type=int, default=1, help="Side-by-side text items per line")
+    parser.add_argument("--texts-in-tables", type=int, default=0, help="Table cells also reported as text items")
+    parser.add_argument("--images-per-page", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerated relative slowdown, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{results['elements']} elements in {results['segments']} segments on {args.pages} pages")
+    print(f"{'stage':16} {'median ms':>10} {'min ms':>10} {'peak MiB':>10}")
+    for name, result in results["stages"].items():
+        print(
+            f"{name:16} {result['seconds']['median'] * 1000:10.1f} {result['seconds']['min'] * 1000:10.1f} "
+            f"{result['peak_traced_bytes'] / 2**20:10.2f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
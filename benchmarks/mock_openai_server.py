@@ -0,0 +1,391 @@
+"""Mock OpenAI-compatible LLM server for load and regression benchmarks.
+
+Implements the parts of the OpenAI API the backend uses:
+
+- `GET /v1/models`
+- `POST /v1/chat/completions`, including streamed responses and structured output
+  (`response_format` of type `json_schema`, as sent by `client.beta.chat.completions.parse`,
+  or vLLM's `guided_json`)
+
+Latency, throughput limits, errors and token rate are configurable and seeded, so a
+run can be repeated exactly on a laptop without GPUs or network access. Runtime
+statistics are served at `GET /mock/stats` and the configuration can be changed
+between benchmark scenarios with `POST /mock/config`.
+
+Run standalone:
+
+    python benchmarks/mock_openai_server.py --port 9000 --latency lognormal --latency-mean 0.8 --error-rate 0.02
+
+or in-process with `with MockServer(config) as base_url: ...` (as `run_benchmarks.py` does).
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+# The translation prompt quotes the source text; echo just that part as the "translation"
+_QUOTED_TEXT = re.compile(r"'(.*)'", re.DOTALL)
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server; all durations are in seconds"""
+
+    models: List[str] = field(default_factory=lambda: ["mock-model"])
+    # Time to first token
+    latency: str = "constant"
+    latency_mean: float = 0.05
+    latency_stddev: float = 0.0
+    # Generation speed per request; 0 returns the whole completion at once
+    tokens_per_second: float = 0.0
+    # Requests processed at once (like a vLLM batch); further requests queue, 0 for unlimited
+    max_concurrency: int = 0
+    # Requests accepted per second before answering 429, 0 for unlimited
+    rate_limit_rps: float = 0.0
+    # Fraction of requests failing with one of error_statuses
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [500, 502, 503, 429])
+    # Fraction of requests that stall for hang_seconds before answering (client timeouts)
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+    # Completion text: "echo" repeats the (quoted part of the) prompt, "fixed" returns fixed_text
+    response_mode: str = "echo"
+    fixed_text: str = "This is a mock completion."
+    max_completion_tokens: int = 1024
+    seed: Optional[int] = 0
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, math.ceil(len(text) / 4))
+
+
+class MockState:
+    """Seeded random source, limits and counters shared by all requests"""
+
+    def __init__(self, config: MockConfig):
+        self.configure(config)
+
+    def configure(self, config: MockConfig) -> None:
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.semaphore = asyncio.Semaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "hung": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def sample_latency(self) -> float:
+        config = self.config
+        mean, stddev = config.latency_mean, config.latency_stddev
+        if config.latency == "uniform":
+            value = self.random.uniform(mean - stddev, mean + stddev)
+        elif config.latency == "normal":
+            value = self.random.gauss(mean, stddev)
+        elif config.latency == "lognormal" and mean > 0:
+            # Parameterised by the mean and standard deviation of the latency itself
+            sigma2 = math.log(1 + (stddev / mean) ** 2)
+            value = self.random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        elif config.latency == "exponential" and mean > 0:
+            value = self.random.expovariate(1 / mean)
+        else:
+            value = mean
+        return max(0.0, value)
+
+    def rate_limited(self) -> bool:
+        if self.config.rate_limit_rps <= 0:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > self.config.rate_limit_rps
+
+
+def _example_from_schema(schema: Dict[str, Any], definitions: Dict[str, Any], rng: random.Random, name: str = "") -> Any:
+    """A value conforming to a JSON schema (the subset Pydantic emits for structured output)"""
+    if "$ref" in schema:
+        return _example_from_schema(definitions[schema["$ref"].split("/")[-1]], definitions, rng, name)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return _example_from_schema(options[0], definitions, rng, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object":
+        return {
+            key: _example_from_schema(value, definitions, rng, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = max(1, schema.get("minItems", 1))
+        return [_example_from_schema(schema.get("items", {}), definitions, rng, name) for _ in range(count)]
+    if schema_type == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 100)), 2)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    return f"mock {name}".strip() if name else "mock"
+
+
+def _response_schema(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return response_format.get("json_schema", {}).get("schema", {})
+    if response_format.get("type") == "json_object":
+        return {"type": "object"}
+    guided_json = body.get("guided_json")
+    if guided_json:
+        return json.loads(guided_json) if isinstance(guided_json, str) else guided_json
+    return None
+
+
+def _completion_text(body: Dict[str, Any], state: MockState) -> str:
+    schema = _response_schema(body)
+    if schema is not None:
+        return json.dumps(_example_from_schema(schema, schema.get("$defs", {}), state.random))
+    config = state.config
+    if config.response_mode == "fixed":
+        return config.fixed_text
+    user_messages = [message.get("content") or "" for message in body.get("messages", []) if message.get("role") == "user"]
+    prompt = user_messages[-1] if user_messages else ""
+    if not isinstance(prompt, str):
+        # Multi-part content
+        prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+    match = _QUOTED_TEXT.search(prompt)
+    text = match.group(1) if match else prompt
+    return text[:config.max_completion_tokens * 4]
+
+
+def _error_response(status: int, message: str) -> JSONResponse:
+    headers = {"Retry-After": "1"} if status == 429 else None
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": "mock_error", "code": status}},
+        headers=headers
+    )
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """FastAPI app serving the mock API for `config`"""
+    app = FastAPI(title="Mock OpenAI-compatible server")
+    app.state.mock = MockState(config or MockConfig())
+
+    @app.get("/v1/models")
+    async def list_models():
+        created = int(time.time())
+        return {
+            "object": "list",
+            "data": [
+                {"id": model, "object": "model", "created": created, "owned_by": "mock"}
+                for model in app.state.mock.config.models
+            ],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        state: MockState = app.state.mock
+        config = state.config
+        body = await request.json()
+        state.stats["requests"] += 1
+
+        if state.rate_limited():
+            state.stats["rate_limited"] += 1
+            return _error_response(429, "Rate limit exceeded")
+
+        # Draw every random decision up front so a seeded run is reproducible under concurrency
+        roll = state.random.random()
+        fails = roll < config.error_rate
+        hangs = not fails and roll < config.error_rate + config.hang_rate
+        error_status = state.random.choice(config.error_statuses) if fails else None
+        latency = state.sample_latency()
+        text = None if fails else _completion_text(body, state)
+
+        async def process():
+            state.stats["in_flight"] += 1
+            state.stats["max_in_flight"] = max(state.stats["max_in_flight"], state.stats["in_flight"])
+            try:
+                if hangs:
+                    state.stats["hung"] += 1
+                    await asyncio.sleep(config.hang_seconds)
+                await asyncio.sleep(latency)
+                if fails:
+                    state.stats["errors"] += 1
+            finally:
+                state.stats["in_flight"] -= 1
+
+        if state.semaphore is not None:
+            async with state.semaphore:
+                await process()
+        else:
+            await process()
+        if fails:
+            return _error_response(error_status, f"Injected upstream error {error_status}")
+
+        model = body.get("model") or config.models[0]
+        prompt_tokens = sum(count_tokens(str(message.get("content") or "")) for message in body.get("messages", []))
+        completion_tokens = count_tokens(text)
+        state.stats["prompt_tokens"] += prompt_tokens
+        state.stats["completion_tokens"] += completion_tokens
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(text, completion_id, created, model, config.tokens_per_second, state),
+                media_type="text/event-stream"
+            )
+
+        if config.tokens_per_second > 0:
+            await asyncio.sleep(completion_tokens / config.tokens_per_second)
+        state.stats["completed"] += 1
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "logprobs": None,
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/mock/stats")
+    async def get_stats():
+        return app.state.mock.stats
+
+    @app.post("/mock/config")
+    async def update_config(request: Request):
+        """Replace the configuration (fields not given keep their current value) and reset the stats"""
+        changes = await request.json()
+        config = dataclasses.replace(app.state.mock.config, **changes)
+        app.state.mock.configure(config)
+        return dataclasses.asdict(config)
+
+    return app
+
+
+async def _stream_chunks(text: str, completion_id: str, created: int, model: str, tokens_per_second: float, state: MockState):
+    """Server-sent events of about one token (four characters) each, paced at the token rate"""
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for start in range(0, len(text), 4):
+        if tokens_per_second > 0:
+            await asyncio.sleep(1 / tokens_per_second)
+        yield chunk({"content": text[start:start + 4]})
+    yield chunk({}, "stop")
+    yield "data: [DONE]\n\n"
+    state.stats["completed"] += 1
+
+
+class MockServer:
+    """Run the mock server on a background thread, e.g. `with MockServer(config) as base_url: ...`"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="mock-openai-server", daemon=True)
+        self.base_url = ""
+
+    def start(self) -> str:
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Mock server failed to start")
+            time.sleep(0.01)
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+    @property
+    def state(self) -> MockState:
+        return self.app.state.mock
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def main() -> None:
+    defaults = MockConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--models", nargs="+", default=defaults.models)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency)
+    parser.add_argument("--latency-mean", type=float, default=defaults.latency_mean)
+    parser.add_argument("--latency-stddev", type=float, default=defaults.latency_stddev)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency)
+    parser.add_argument("--rate-limit-rps", type=float, default=defaults.rate_limit_rps)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=defaults.error_statuses)
+    parser.add_argument("--hang-rate", type=float, default=defaults.hang_rate)
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--response-mode", choices=("echo", "fixed"), default=defaults.response_mode)
+    parser.add_argument("--fixed-text", default=defaults.fixed_text)
+    parser.add_argument("--max-completion-tokens", type=int, default=defaults.max_completion_tokens)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    uvicorn.run(create_app(MockConfig(**args)), host=host, port=port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Generated PDFs for the /translate-pdf benchmarks.
+
+Each document is built with PyMuPDF from fixed text, so the same inputs are
+produced on every machine and commit.
+"""
+from typing import Callable, Dict
+
+import fitz
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 56
+
+PARAGRAPH = (
+    "The committee reviewed the quarterly figures and agreed that the regional offices "
+    "should report their digitalisation progress every month. Paper records older than "
+    "five years will be scanned, indexed and made searchable before the end of the year."
+)
+
+
+def _write_paragraphs(page: fitz.Page, paragraphs: int, top: float = MARGIN) -> None:
+    y = top
+    page.insert_text((MARGIN, y), f"Section {page.number + 1}", fontsize=16)
+    y += 30
+    for index in range(paragraphs):
+        rect = fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 70)
+        page.insert_textbox(rect, f"{index + 1}. {PARAGRAPH}", fontsize=10)
+        y += 80
+
+
+def text_only_pdf(pages: int) -> bytes:
+    """Headings and paragraphs of plain text"""
+    with fitz.open() as doc:
+        for _ in range(pages):
+            _write_paragraphs(doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), paragraphs=8)
+        return doc.tobytes()
+
+
+def table_heavy_pdf(pages: int, rows: int = 20, columns: int = 5) -> bytes:
+    """A ruled table per page, with a short caption"""
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    cell_height = 24
+    with fitz.open() as doc:
+        for _ in range(pages):
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_text((MARGIN, MARGIN), "Table: records digitised per office and quarter", fontsize=12)
+            top = MARGIN + 20
+            for row in range(rows + 1):
+                for column in range(columns):
+                    rect = fitz.Rect(
+                        MARGIN + column * cell_width, top + row * cell_height,
+                        MARGIN + (column + 1) * cell_width, top + (row + 1) * cell_height
+                    )
+                    page.draw_rect(rect, color=(0, 0, 0), width=0.5)
+                    text = f"Quarter {column + 1}" if row == 0 else f"Office {row} item {column + 1}"
+                    page.insert_textbox(rect + (3, 5, -3, -3), text, fontsize=8)
+        return doc.tobytes()
+
+
+def scanned_pdf(pages: int, dpi: int = 150) -> bytes:
+    """Pages that are only an image of text, so the pipeline has to OCR them"""
+    with fitz.open() as source, fitz.open() as doc:
+        for _ in range(pages):
+            _write_paragraphs(source.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), paragraphs=6)
+        for source_page in source:
+            pixmap = source_page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_image(page.rect, pixmap=pixmap)
+        return doc.tobytes(deflate=True)
+
+
+PDF_FIXTURES: Dict[str, Callable[[int], bytes]] = {
+    "text_only": text_only_pdf,
+    "table_heavy": table_heavy_pdf,
+    "scanned": scanned_pdf,
+}
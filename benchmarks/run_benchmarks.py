@@ -0,0 +1,335 @@
+"""End-to-end benchmarks for the backend endpoints.
+
+Runs the FastAPI app in-process (requests go through httpx's ASGI transport, so no
+server or network is involved on the backend side) against the mock OpenAI-compatible
+server in `mock_openai_server.py`, and reports throughput and p50/p95/p99 latency for
+/translate, /free-processing, /structured-inference, /prompt-page and /translate-pdf
+(on generated text-only, table-heavy and scanned PDFs).
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --output new.json
+
+With `--baseline`, scenarios whose p50/p95 latency or throughput regressed by more
+than `--max-regression` are listed and the exit status is 1, so two commits can be
+compared in CI. The backend app is imported whatever endpoints are selected, so the
+backend's full dependencies (including PyMuPDF, torch and Docling) must always be
+installed; only /translate-pdf also needs the Docling models, and its PDF fixtures are
+generated only when it is selected with `--endpoints`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from mock_openai_server import LATENCY_DISTRIBUTIONS, MockConfig, MockServer
+from pdf_fixtures import PDF_FIXTURES
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = REPO_DIR / "backend"
+
+ENDPOINTS = ("translate", "free-processing", "structured-inference", "prompt-page", "translate-pdf")
+MODEL_NAME = "mock-model"
+API_TOKEN = "benchmark-token"
+
+SAMPLE_TEXT = (
+    "The regional office has scanned 12,480 pages of land records this quarter. "
+    "Indexing of the remaining archive is scheduled to finish in March."
+)
+
+
+@dataclass
+class Scenario:
+    name: str
+    endpoint: str
+    requests: int
+    concurrency: int
+    # Keyword arguments for httpx's `client.post`, given the request number
+    build_request: Callable[[int], Dict[str, Any]]
+    # Whether a response is a failure; endpoints report upstream errors in a 200 body
+    is_error: Callable[[httpx.Response], bool]
+
+
+def _json_error(response: httpx.Response, check: Callable[[Any], bool]) -> bool:
+    if response.status_code != 200:
+        return True
+    try:
+        return check(response.json())
+    except ValueError:
+        return True
+
+
+def build_scenarios(args: argparse.Namespace, api_url: str) -> List[Scenario]:
+    credentials = {"url": api_url, "authorization": API_TOKEN}
+    scenarios = {
+        "translate": [Scenario(
+            "translate", "/translate", args.requests, args.concurrency,
+            lambda i: {"json": {
+                "text": f"{SAMPLE_TEXT} ({i})",
+                "input_language": "English",
+                "output_language": "Malay (Bahasa Melayu)",
+                "user_prompt": "",
+                "translation_model_name": MODEL_NAME,
+                **credentials,
+            }},
+            lambda response: _json_error(
+                response, lambda body: str(body.get("translated_text", "")).startswith("Translation error")
+            ),
+        )],
+        "free-processing": [Scenario(
+            "free-processing", "/free-processing", args.requests, args.concurrency,
+            lambda i: {"json": {
+                "text": f"{SAMPLE_TEXT} ({i})",
+                "system_prompt": "You are a helpful assistant.",
+                "user_prompt": "Summarise the following text",
+                "model_name": MODEL_NAME,
+                **credentials,
+            }},
+            lambda response: _json_error(response, lambda body: str(body).startswith("Free processing error")),
+        )],
+        "structured-inference": [Scenario(
+            "structured-inference", "/structured-inference", args.requests, args.concurrency,
+            lambda i: {"json": {
+                "openaiapi": True,
+                "input_text": f"{SAMPLE_TEXT} ({i})",
+                "prompt_value": "Extract the office, page count and completion month.",
+                "headerlist": [
+                    {"column_name": "office", "column_type": "string"},
+                    {"column_name": "pages", "column_type": "number"},
+                    {"column_name": "completed", "column_type": "boolean"},
+                ],
+                "modelname": MODEL_NAME,
+                **credentials,
+            }},
+            lambda response: _json_error(response, lambda body: str(body).startswith("Structured inference error")),
+        )],
+        "prompt-page": [Scenario(
+            "prompt-page", "/prompt-page", args.requests, args.concurrency,
+            lambda i: {"json": {
+                "openaiapi": True,
+                "schema_prompt_value": f"Columns for a land record register ({i})",
+                "prompt_form_submitted": True,
+                "model_name": MODEL_NAME,
+                **credentials,
+            }},
+            lambda response: _json_error(response, lambda body: "error" in body),
+        )],
+    }
+    if "translate-pdf" in args.endpoints:
+        # Only generate the PDF fixtures when the endpoint is benchmarked
+        scenarios["translate-pdf"] = [
+            _pdf_scenario(fixture, generate(args.pdf_pages), args, credentials)
+            for fixture, generate in PDF_FIXTURES.items()
+        ]
+    return [scenario for endpoint in args.endpoints for scenario in scenarios[endpoint]]
+
+
+def _pdf_scenario(fixture: str, pdf_bytes: bytes, args: argparse.Namespace, credentials: Dict[str, str]) -> Scenario:
+    return Scenario(
+        f"translate-pdf[{fixture}]", "/translate-pdf", args.pdf_requests, args.pdf_concurrency,
+        lambda i: {
+            "files": {"file": (f"{fixture}.pdf", pdf_bytes, "application/pdf")},
+            "data": {
+                "input_language": "English",
+                "output_language": "Malay (Bahasa Melayu)",
+                "include_tbl_content": "true",
+                "translation_model_name": MODEL_NAME,
+                **credentials,
+            },
+        },
+        lambda response: response.status_code != 200,
+    )
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of already sorted values, q in [0, 100]"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarise(latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "wall_seconds": wall_seconds,
+        "throughput_rps": count / wall_seconds if wall_seconds else 0.0,
+        "latency_seconds": {
+            "min": ordered[0] if ordered else 0.0,
+            "mean": sum(ordered) / count if count else 0.0,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0,
+        },
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, warmup: int) -> Dict[str, Any]:
+    for i in range(warmup):
+        await client.post(scenario.endpoint, **scenario.build_request(-1 - i))
+
+    semaphore = asyncio.Semaphore(scenario.concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(scenario.endpoint, **scenario.build_request(i))
+                failed = scenario.is_error(response)
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(scenario.requests)))
+    return summarise(latencies, errors, time.perf_counter() - start)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Scenarios that got slower, lost throughput or failed more often than the baseline"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for stat in ("p50", "p95"):
+            before, after = previous["latency_seconds"][stat], current["latency_seconds"][stat]
+            if before > 0 and after > before * (1 + max_regression):
+                regressions.append(f"{name}: {stat} latency {before:.3f}s -> {after:.3f}s")
+        before, after = previous["throughput_rps"], current["throughput_rps"]
+        if before > 0 and after < before * (1 - max_regression):
+            regressions.append(f"{name}: throughput {before:.2f} -> {after:.2f} req/s")
+        before, after = previous["error_rate"], current["error_rate"]
+        if after > before + 0.01:
+            regressions.append(f"{name}: error rate {before:.1%} -> {after:.1%}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load_backend_app():
+    """Import the backend app with settings suited to benchmarking, unless overridden in the environment"""
+    # Benchmark jobs must not be recorded as history for the PDF time estimator
+    os.environ.setdefault("ESTIMATOR_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(BACKEND_DIR))
+    from main import app
+    return app
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    print(f"{'scenario':34} {'reqs':>5} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_seconds"]
+        print(
+            f"{name:34} {result['requests']:5d} {result['errors']:5d} {result['throughput_rps']:8.2f} "
+            f"{latency['p50']:8.3f} {latency['p95']:8.3f} {latency['p99']:8.3f}"
+        )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mock_config = MockConfig(
+        models=[MODEL_NAME],
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_stddev=args.latency_stddev,
+        tokens_per_second=args.tokens_per_second,
+        max_concurrency=args.mock_max_concurrency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    app = _load_backend_app()
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": asdict(mock_config),
+        "options": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "scenarios": {},
+    }
+
+    mock = MockServer(mock_config)
+    api_url = mock.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as client:
+            for scenario in build_scenarios(args, api_url):
+                # Same random sequence and fresh counters for every scenario
+                mock.state.configure(mock_config)
+                print(f"Running {scenario.name} ({scenario.requests} requests, concurrency {scenario.concurrency})", file=sys.stderr)
+                result = await run_scenario(client, scenario, args.warmup)
+                result["upstream"] = dict(mock.state.stats)
+                results["scenarios"][scenario.name] = result
+    finally:
+        mock.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks for the backend endpoints")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per text endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per text endpoint")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests before each scenario")
+    parser.add_argument("--pdf-pages", type=int, default=3, help="Pages per generated PDF")
+    parser.add_argument("--pdf-requests", type=int, default=2, help="Requests per PDF fixture")
+    parser.add_argument("--pdf-concurrency", type=int, default=1)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal", help="Mock upstream latency distribution")
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument("--latency-stddev", type=float, default=0.02)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--mock-max-concurrency", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerated relative slowdown, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
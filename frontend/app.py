@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+MODEL_LIST_TTL_SECONDS = int(os.getenv("FRONTEND_MODEL_LIST_TTL_SECONDS", "300"))
+
 # Initialize session state variables
 session_defaults = {
     'selected_page': "Data Loader",
@@ -68,23 +70,29 @@ user_input_token = st.sidebar.text_input("API Token", value=default_token or "",
 if user_input_url != default_url:
     st.session_state.url_edited = True
 
-# Function to fetch models from API
-def fetch_models(show_errors=False):
-    url = user_input_url + "/v1/models"
+# Model lists are cached per URL and token, so new sessions and page loads don't refetch them
+@st.cache_data(ttl=MODEL_LIST_TTL_SECONDS, show_spinner=False)
+def list_models(api_url, api_token):
     headers = {
         "Content-Type": "application/json",
-        "Authorization": f"Bearer {user_input_token}"
+        "Authorization": f"Bearer {api_token}"
     }
+    response = requests.get(api_url + "/v1/models", headers=headers)
+    if response.status_code == 200:
+        return [model["id"] for model in response.json()["data"]]
+    elif response.status_code == 401:
+        raise Exception(f"Response status {response.status_code} Unauthorized. Check your API token.")
+    else:
+        raise Exception(f"Response status {response.status_code}")
+
+# Function to fetch models from API
+def fetch_models(show_errors=False, refresh=False):
+    url = user_input_url + "/v1/models"
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            model_list = [model["id"] for model in response.json()["data"]]
-            st.session_state.model_list = model_list
-            st.session_state.last_fetched_url = user_input_url
-        elif response.status_code == 401:
-            raise Exception(f"Response status {response.status_code} Unauthorized. Check your API token.")
-        else:
-            raise Exception(f"Response status {response.status_code}")
+        if refresh:
+            list_models.clear()
+        st.session_state.model_list = list_models(user_input_url, user_input_token)
+        st.session_state.last_fetched_url = user_input_url
 
     except requests.exceptions.MissingSchema:
         if show_errors:
@@ -126,7 +134,7 @@ if st.session_state.last_fetched_url != user_input_url:
 
 # Manual refresh button
 if st.sidebar.button("Refresh models"):
-    fetch_models(show_errors=True)
+    fetch_models(show_errors=True, refresh=True)
 
 # Model selection
 if "model_list" in st.session_state:
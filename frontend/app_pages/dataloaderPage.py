@@ -1,7 +1,8 @@
-import pandas as pd
 import streamlit as st
-from st_aggrid import AgGrid, GridOptionsBuilder
 from streamlit_pdf_viewer import pdf_viewer
+from utils.checkpoint import file_hash
+from utils.data_loader import TABULAR_EXTENSIONS, load_table, read_header, read_rows
+from utils.grid import show_grid
 
 st.title("Data Loader")
 
@@ -13,17 +14,15 @@ if "data_loaded" not in st.session_state:
     st.session_state.clear()
 
 # File uploader
-uploaded_file = st.file_uploader("Upload a file", type=["csv", "xlsx", "pdf"])
+uploaded_file = st.file_uploader("Upload a file", type=TABULAR_EXTENSIONS + ["pdf"])
 
 if uploaded_file:
-    # Read the uploaded file into a DataFrame
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    elif uploaded_file.name.endswith(".xlsx"):
-        df = pd.read_excel(uploaded_file)
-
     # Store the uploaded file in session state for future use
     st.session_state.original_file = uploaded_file.name
+    # Identifies the file content for caching and resumable batch runs; hashed once per upload
+    if st.session_state.get("file_id") != uploaded_file.file_id:
+        st.session_state.file_id = uploaded_file.file_id
+        st.session_state.file_hash = file_hash(uploaded_file.getvalue())
     if uploaded_file.name.endswith(".pdf"):
         with st.spinner("Processing PDF file..."):
             try:
@@ -48,57 +47,33 @@ if uploaded_file:
         # Display the uploaded file content using AgGrid
         st.subheader("Uploaded File Contents")
         
-        # Show only first 100 rows initially
-        preview_df = df.head(100)
+        # Only the header and the first 100 rows are parsed until columns are selected
+        columns = read_header(uploaded_file)
+        preview_df = read_rows(uploaded_file, nrows=100)
         
-        # Configure AgGrid options
-        gb = GridOptionsBuilder.from_dataframe(preview_df)
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_side_bar()
-        gb.configure_default_column(wrapText=True, autoHeight=True)
-        grid_options = gb.build()
-
-        # Render the grid
-        AgGrid(
-            preview_df,
-            gridOptions=grid_options,
-            enable_enterprise_modules=False,
-            theme="streamlit",
-            fit_columns_on_grid_load=True,
-        )
+        show_grid(preview_df, key="uploaded_preview", side_bar=True)
 
         # Allow column selection
-        selected_columns = st.multiselect("Select columns for LLM processing", df.columns.tolist(), [])
+        selected_columns = st.multiselect("Select columns for LLM processing", columns, [])
         if selected_columns:
-            st.session_state.original_df = df
-            st.session_state.selected_df = df[selected_columns]
+            # Parsed tables are cached by file hash and shared, not copied, between reruns
+            full_df = load_table(st.session_state.file_hash, tuple(selected_columns), uploaded_file)
+            st.session_state.selected_df = full_df
             st.session_state.selected_columns = selected_columns
             st.session_state.data_loaded = True
 
-            # After column selection, display the full dataset
-            full_df = df[selected_columns]
-            st.subheader("Selected Columns for Processing (Full Data)")
-            
-            # Configure AgGrid options for full data
-            selected_gb = GridOptionsBuilder.from_dataframe(full_df)
-            selected_gb.configure_pagination(paginationAutoPageSize=True)
-            selected_gb.configure_default_column(wrapText=True, autoHeight=True)
-            selected_grid_options = selected_gb.build()
-
-            AgGrid(
-                full_df,
-                gridOptions=selected_grid_options,
-                enable_enterprise_modules=False,
-                theme="streamlit",
-                fit_columns_on_grid_load=True,
-            )
+            # After column selection, display the full dataset one page at a time
+            show_grid(full_df, title="Selected Columns for Processing (Full Data)", key="selected_data")
 
             # Append or save mode toggle
             st.subheader("Save Options")
             st.session_state.append_mode = st.checkbox("Append processed output to original file", value=False)
             if st.session_state.append_mode:
+                # The remaining columns are only parsed when they are needed for the output
+                st.session_state.original_df = load_table(st.session_state.file_hash, None, uploaded_file)
                 st.info("Processed output will be appended to the original file.")
             else:
+                st.session_state.pop("original_df", None)
                 st.info("Processed output will be saved as a new file.")
 
             st.success("Data successfully loaded and prepared for processing!")
@@ -1,13 +1,17 @@
-import io
-import requests
 import streamlit as st
 import pandas as pd
 import json
-# Replace st_aggrid with st.dataframe if AgGrid causes issues
-from st_aggrid import AgGrid, GridOptionsBuilder
+from functools import partial
 
 from dotenv import load_dotenv
 import os
+from utils.batch_runner import (
+    DEFAULT_MAX_WORKERS, DEFAULT_ROW_TIMEOUT, MAX_WORKERS_LIMIT, get_http_session, process_columns
+)
+from utils.exports import dataframe_hash, download_buttons, export_key
+from utils.grid import show_grid
+from utils.jobs import get_job_manager, job_progress
+from utils.profiler import profile_columns, workload_caption
 # Load environment variables from .env file
 load_dotenv()
 API_URL = os.getenv("API_URL")
@@ -28,36 +32,44 @@ def error_popup(e):
     if refresh_button:
         st.rerun()
 
-def process_with_model(text, system_prompt, user_prompt):
+def process_cell(text, session, backend_url, system_prompt, user_prompt, api_url, api_token, model_name, timeout):
+    """Process one cell through the backend (runs on a worker thread, must not touch st.*)"""
+    data = {
+        'text': "" if pd.isna(text) else str(text),
+        'system_prompt': system_prompt,
+        'user_prompt': user_prompt,
+        'url': api_url,
+        'authorization': api_token,
+        'model_name': model_name
+    }
     try:
-            # Prepare the files and parameters for the request
-            # FastAPI backend URL
-            # backend_url = "http://localhost:8000/free-processing"
-            backend_url = os.getenv("BACKEND_FREE_URL")
-
-            data = {
-                'text': text,
-                'system_prompt': system_prompt,
-                'user_prompt': user_prompt,
-                'url': st.session_state.openaiapiurl,
-                'authorization':st.session_state.openapitoken,
-                'model_name':st.session_state['selected_model']
-            }
-
-            print(data)
-
-            # Send the request to the backend
-            response = requests.post(backend_url, data=data)
-
-            # Handle the response
-            if response.status_code == 200:
-                return response.content  # The free processing content
-            else:
-                st.error(f"Error: {response.text}")
-                return None
+        response = session.post(backend_url, json=data, timeout=timeout)
+        if response.status_code == 200:
+            return response.json()  # The free processing content
+        return f"Error: {response.text}"
     except Exception as e:
-        st.error(f"An error occurred: {e}")
+        return f"Error: {e}"
+
+def bind_process_cell(system_prompt, user_prompt, timeout=DEFAULT_ROW_TIMEOUT):
+    """Bind request settings on the script thread; worker threads cannot read session state"""
+    return partial(
+        process_cell,
+        session=get_http_session(),
+        backend_url=os.getenv("BACKEND_FREE_URL"),
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        api_url=st.session_state.get('openaiapiurl'),
+        api_token=st.session_state.get('openapitoken'),
+        model_name=st.session_state.get('selected_model'),
+        timeout=timeout
+    )
+
+def process_with_model(text, system_prompt, user_prompt):
+    result = bind_process_cell(system_prompt, user_prompt)(text)
+    if isinstance(result, str) and result.startswith("Error: "):
+        st.error(result)
         return None
+    return result
 
 # Function to load configuration from uploaded file
 def load_config(uploaded_file):
@@ -143,21 +155,9 @@ if 'selected_df' not in st.session_state or st.session_state.selected_df is None
                     )
 else:
         
-    # Display the currently loaded DataFrame using AgGrid or st.dataframe
+    # Display the currently loaded DataFrame, one page at a time
     df = st.session_state.selected_df
-    st.subheader("Loaded DataFrame")
-
-    # If AgGrid causes issues, use st.dataframe instead
-    try:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_side_bar()
-        gb.configure_default_column(wrapText=True, autoHeight=True)
-        grid_options = gb.build()
-
-        AgGrid(df, gridOptions=grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-    except AttributeError:
-        st.dataframe(df)
+    show_grid(df, title="Loaded DataFrame", key="loaded_data", side_bar=True)
 
     # Prompt settings
     st.subheader("Prompt Settings")
@@ -202,6 +202,35 @@ else:
     else:
         st.info("Processed output will be saved as a new file.")
 
+    # Execution settings
+    st.subheader("Execution Settings")
+    col1, col2 = st.columns(2)
+    with col1:
+        max_workers = st.number_input(
+            "Parallel requests",
+            min_value=1,
+            max_value=MAX_WORKERS_LIMIT,
+            value=DEFAULT_MAX_WORKERS,
+            help="Number of rows processed concurrently. Lower this if the model server is overloaded."
+        )
+    with col2:
+        row_timeout = st.number_input(
+            "Per-row timeout (seconds)",
+            min_value=1,
+            value=int(DEFAULT_ROW_TIMEOUT),
+            help="Rows that take longer are recorded as errors instead of stalling the run."
+        )
+    deduplicate = st.checkbox(
+        "Process unique values only",
+        value=False,
+        help="Process each distinct value once and reuse the result for repeated cells."
+    )
+    profile = profile_columns(df, st.session_state.get("file_hash"))
+    st.caption(workload_caption(profile, len(df)))
+    with st.expander("Column profile"):
+        st.dataframe(profile)
+    process = bind_process_cell(system_prompt, user_prompt, row_timeout)
+
     # Preview and Run Buttons
     if st.button("Preview"):
         if total_chars > 2048:
@@ -213,12 +242,11 @@ else:
             sample_size = min(5, len(df))  # Ensure sample size does not exceed the number of rows
             preview_df = df.sample(n=sample_size)
             preview_data = {}
+            processed = process_columns(preview_df, list(df.columns), process, max_workers, deduplicate=deduplicate)
             for column in df.columns:
                 processed_column_name = f"{column}_processed"
                 preview_data[column] = preview_df[column].tolist()
-                preview_data[processed_column_name] = [
-                    process_with_model(text, system_prompt, user_prompt) for text in preview_df[column]
-                ]
+                preview_data[processed_column_name] = processed[column]
 
             # Arrange columns side by side
             interleaved_columns = []
@@ -228,44 +256,39 @@ else:
 
             preview_result = pd.DataFrame(preview_data)[interleaved_columns]
 
-            # Display the preview using AgGrid or st.dataframe
-            st.subheader("Preview Result")
-            try:
-                gb_preview = GridOptionsBuilder.from_dataframe(preview_result)
-                gb_preview.configure_pagination(paginationAutoPageSize=True)
-                gb_preview.configure_default_column(wrapText=True, autoHeight=True)
-                preview_grid_options = gb_preview.build()
+            show_grid(preview_result, title="Preview Result", key="preview_result")
 
-                AgGrid(preview_result, gridOptions=preview_grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-            except AttributeError:
-                st.dataframe(preview_result)
-
-    if st.button("Run"):
+    # The full run is a background job, so reruns do not interrupt it
+    job_manager = get_job_manager()
+    job = job_manager.get(st.session_state.get('free_processing_job_id'))
+    if st.button("Run", disabled=job is not None and not job.finished):
         if total_chars > 2048:
             st.warning("Cannot proceed: The combined length of System Prompt and User Prompt exceeds 2048 characters.")
         else:
-            # Run the full processing and generate a processed DataFrame
-            st.subheader("Processing Data...")
-
-            processed_data = {}
-            total_texts = len(df) * len(df.columns)
-            progress = st.progress(0)
-            progress_counter = 0
-
-            for column in df.columns:
-                processed_column_name = f"{column}_processed"
-                processed_texts = []
-                for text in df[column]:
-                    processed_text = process_with_model(text, system_prompt, user_prompt)
-                    processed_texts.append(processed_text)
-                    progress_counter += 1
-                    progress.progress(progress_counter / total_texts)
-                processed_data[processed_column_name] = processed_texts
-
-            processed_df = pd.DataFrame(processed_data)
+            # Process all rows of all columns concurrently, keeping results in row order
+            run_processing = partial(process_columns, df, list(df.columns), process, max_workers, deduplicate=deduplicate)
+            st.session_state.free_processing_job_id = job_manager.submit("Processed", run_processing)
+            job = job_manager.get(st.session_state.free_processing_job_id)
+
+    if job is not None and not job.finished:
+        st.subheader("Processing Data...")
+        job_progress(job.id)
+    elif job is not None:
+        job_manager.discard(job.id)
+        del st.session_state.free_processing_job_id
+        if job.status == "completed":
+            processed_data = {f"{column}_processed": results for column, results in job.result.items()}
+
+            # Keep the original index so append mode lines rows up with the original file
+            processed_df = pd.DataFrame(processed_data, index=df.index)
             st.session_state.processed_df = processed_df  # Store the processed DataFrame in session state
+            st.session_state.processed_df_hash = dataframe_hash(processed_df)
             st.session_state.processing_complete = True
             st.success("Processing completed!")
+        elif job.status == "cancelled":
+            st.warning("Processing cancelled.")
+        else:
+            st.error(f"Processing failed: {job.error}")
 
     # Check if processed_df exists in session state
     if 'processed_df' in st.session_state:
@@ -286,65 +309,23 @@ else:
             # Use only the processed DataFrame
             output_df = processed_df
 
-        # Display the output DataFrame using AgGrid or st.dataframe
-        st.subheader("Processed Result")
-        try:
-            gb_processed = GridOptionsBuilder.from_dataframe(output_df)
-            gb_processed.configure_pagination(paginationAutoPageSize=True)
-            gb_processed.configure_default_column(wrapText=True, autoHeight=True)
-            processed_grid_options = gb_processed.build()
-
-            AgGrid(output_df, gridOptions=processed_grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-        except AttributeError:
-            st.dataframe(output_df)
+        show_grid(output_df, title="Processed Result", key="output_data")
 
         # Provide download options
         st.subheader("Download Processed Data")
 
-        # Convert DataFrame to various formats
-        csv_buffer = output_df.to_csv(index=False).encode('utf-8')
-        json_buffer = output_df.to_json(orient='records', indent=2).encode('utf-8')
-
-        # Create an Excel file in-memory
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-            output_df.to_excel(writer, index=False, sheet_name='Processed_Data')
-            # The context manager saves the file automatically
-
         # Prepare file name based on original file name and append mode
         if 'original_file' in st.session_state and st.session_state.original_file:
             original_file_name = st.session_state.original_file.rsplit('.', 1)[0]
         else:
             original_file_name = 'processed_data'
 
-        if append_mode:
-            csv_file_name = f"{original_file_name}_appended.csv"
-            json_file_name = f"{original_file_name}_appended.json"
-            excel_file_name = f"{original_file_name}_appended.xlsx"
-        else:
-            csv_file_name = f"{original_file_name}_processed.csv"
-            json_file_name = f"{original_file_name}_processed.json"
-            excel_file_name = f"{original_file_name}_processed.xlsx"
-
-        # Add download buttons
-        st.download_button(
-            label="Download as CSV",
-            data=csv_buffer,
-            file_name=csv_file_name,
-            mime="text/csv"
-        )
-        st.download_button(
-            label="Download as JSON",
-            data=json_buffer,
-            file_name=json_file_name,
-            mime="application/json"
-        )
-        st.download_button(
-            label="Download as Excel",
-            data=excel_buffer.getvalue(),
-            file_name=excel_file_name,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        suffix = "appended" if append_mode else "processed"
+        content_hash = export_key(
+            st.session_state.processed_df_hash, st.session_state.get("file_hash", "") if append_mode else "",
+            suffix, *map(str, output_df.columns)
         )
+        download_buttons(output_df, f"{original_file_name}_{suffix}", content_hash, sheet_name='Processed_Data')
 
     st.subheader("Save Prompt")
 
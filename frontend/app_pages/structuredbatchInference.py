@@ -1,49 +1,38 @@
 import streamlit as st
 import os
-import requests
 import pandas as pd
-import io
 import json
+from functools import partial
 from dotenv import load_dotenv
-from st_aggrid import AgGrid, GridOptionsBuilder
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from utils.batch_runner import (
+    DEFAULT_MAX_WORKERS, DEFAULT_ROW_TIMEOUT, MAX_WORKERS_LIMIT, get_http_session, process_columns
+)
+from utils.exports import dataframe_hash, download_buttons, export_key
+from utils.grid import show_grid
+from utils.jobs import get_job_manager, job_progress
+from utils.profiler import profile_columns, workload_caption
+from utils.checkpoint import column_checkpoints
 
 # Load environment variables
 load_dotenv()
 
 # --- Utility Functions ---
 
-def display_aggrid(df, title="DataFrame"):
-    st.subheader(title)
-    try:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_default_column(wrapText=True, autoHeight=True)
-        grid_options = gb.build()
-        AgGrid(df, gridOptions=grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-    except Exception:
-        st.dataframe(df)
-
-def download_processed_files(df, base_name):
-    csv_buffer = df.to_csv(index=False).encode('utf-8')
-    json_buffer = df.to_json(orient='records', indent=2).encode('utf-8')
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Processed_Data')
-
-    st.download_button("Download as CSV", csv_buffer, file_name=f"{base_name}.csv", mime="text/csv")
-    st.download_button("Download as JSON", json_buffer, file_name=f"{base_name}.json", mime="application/json")
-    st.download_button("Download as Excel", excel_buffer.getvalue(), file_name=f"{base_name}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+# Messages returned by run_inference and the backend instead of a result
+ERROR_PREFIXES = ("Backend error:", "Request failed:", "Structured inference error:")
+
+def is_failed_result(result):
+    return not isinstance(result, str) or result.startswith(ERROR_PREFIXES)
 
 def is_prompt_config_ready():
     return 'request' in st.session_state and 'required_schema' in st.session_state
 
-def run_inference(input_text, request, required_schema, openaiapiurl, openapitoken, selected_model):
+def run_inference(input_text, request, required_schema, openaiapiurl, openapitoken, selected_model, session=None, timeout=DEFAULT_ROW_TIMEOUT):
+    """Run structured inference for one cell (runs on worker threads: errors are returned, not shown with st.*)"""
     backend_url = os.getenv("BACKEND_STRUCTURED_INF_URL")
     data = {
         'openaiapi': True,
-        'input_text': input_text,
+        'input_text': "" if pd.isna(input_text) else str(input_text),
         'prompt_value': request,
         'headerlist': required_schema,
         'url': openaiapiurl,
@@ -51,15 +40,13 @@ def run_inference(input_text, request, required_schema, openaiapiurl, openapitok
         'modelname': selected_model
     }
     try:
-        response = requests.post(backend_url, json=data)
+        response = (session or get_http_session()).post(backend_url, json=data, timeout=timeout)
         if response.status_code == 200:
             return response.json()
         else:
-            st.error(f"Backend error: {response.text}")
-            return None
+            return f"Backend error: {response.text}"
     except Exception as e:
-        st.error(f"Request failed: {e}")
-        return None
+        return f"Request failed: {e}"
 
 def load_config(uploaded_file):
     try:
@@ -80,7 +67,7 @@ if 'selected_df' not in st.session_state or st.session_state.selected_df is None
 else:
     df = st.session_state.selected_df
 
-display_aggrid(df, title="Loaded DataFrame")
+show_grid(df, title="Loaded DataFrame", key="loaded_data")
 
 # Load config file
 if not is_prompt_config_ready():
@@ -113,6 +100,45 @@ if append_mode:
 else:
     st.info("Processed output will be saved as a new file.")
 
+st.subheader("Execution Settings")
+col1, col2 = st.columns(2)
+with col1:
+    max_workers = st.number_input(
+        "Parallel requests",
+        min_value=1,
+        max_value=MAX_WORKERS_LIMIT,
+        value=DEFAULT_MAX_WORKERS,
+        help="Number of rows processed concurrently. Lower this if the model server is overloaded."
+    )
+with col2:
+    row_timeout = st.number_input("Per-row timeout (seconds)", min_value=1, value=int(DEFAULT_ROW_TIMEOUT))
+deduplicate = st.checkbox(
+    "Process unique values only",
+    value=False,
+    help="Process each distinct value once and reuse the result for repeated cells."
+)
+profile = profile_columns(df, st.session_state.get("file_hash"))
+st.caption(workload_caption(profile, len(df)))
+with st.expander("Column profile"):
+    st.dataframe(profile)
+
+# Completed rows are saved to disk while running, so an interrupted run can be resumed
+checkpoints = column_checkpoints(
+    st.session_state.get("file_hash"),
+    list(df.columns),
+    prompt=[st.session_state.get("request"), st.session_state.get("required_schema")],
+    model=st.session_state.get("selected_model"),
+    is_failure=is_failed_result
+)
+saved_cells = sum(checkpoint.count() for checkpoint in checkpoints.values())
+resume = False
+if saved_cells:
+    resume = st.checkbox(
+        f"Resume from saved progress ({saved_cells:,} cells already processed)",
+        value=True,
+        help="Only process the cells that an earlier, interrupted run did not complete."
+    )
+
 # --- Preview ---
 if st.button("Preview"):
     st.subheader("Processing Preview")
@@ -123,24 +149,29 @@ if st.button("Preview"):
     openapitoken = st.session_state.get("openapitoken")
     selected_model = st.session_state.get("selected_model")
 
+    infer = partial(
+        run_inference, request=request, required_schema=required_schema, openaiapiurl=openaiapiurl,
+        openapitoken=openapitoken, selected_model=selected_model, session=get_http_session(), timeout=row_timeout
+    )
+    processed = process_columns(preview_df, list(df.columns), infer, max_workers, deduplicate=deduplicate)
+
     preview_data = {}
     for column in df.columns:
         preview_data[column] = preview_df[column].tolist()
-        preview_data[f"{column}_json"] = [
-            run_inference(text, request, required_schema, openaiapiurl, openapitoken, selected_model)
-            for text in preview_df[column]
-        ]
+        preview_data[f"{column}_json"] = processed[column]
 
     interleaved_columns = []
     for col in df.columns:
         interleaved_columns += [col, f"{col}_json"]
 
     preview_result = pd.DataFrame(preview_data)[interleaved_columns]
-    display_aggrid(preview_result, title="Preview Result")
+    show_grid(preview_result, title="Preview Result", key="preview_result")
 
 # --- Run Batch Inference ---
-if st.button("Run"):
-    timestart = time.time()
+# The full run is a background job, so reruns do not interrupt it
+job_manager = get_job_manager()
+job = job_manager.get(st.session_state.get("structured_job_id"))
+if st.button("Run", disabled=job is not None and not job.finished):
     request = st.session_state.get('request')
     required_schema = st.session_state.get('required_schema')
     openaiapiurl = st.session_state.get('openaiapiurl')
@@ -152,33 +183,41 @@ if st.button("Run"):
         st.error(f"Missing configuration keys: {', '.join(missing_keys)}")
         st.stop()
 
-    total_texts = len(df) * len(df.columns)
-    progress = st.progress(0)
-    timer_display = st.empty()
-    progress_counter = 0
-    processed_columns = {f"{col}_json": [] for col in df.columns}
-
-    def process_text(column, text):
-        result = run_inference(text, request, required_schema, openaiapiurl, openapitoken, selected_model)
-        return column, result
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = []
-        for col in df.columns:
-            for text in df[col]:
-                futures.append(executor.submit(process_text, col, text))
-
-        for i, future in enumerate(as_completed(futures)):
-            col, result = future.result()
-            processed_columns[f"{col}_json"].append(result)
-            progress_counter += 1
-            progress.progress(progress_counter / total_texts)
-            timer_display.text(f"Elapsed Time: {time.time() - timestart:.2f} seconds")
-
-    processed_df = pd.DataFrame(processed_columns)
-    st.session_state.jprocessed_df = processed_df
-    st.session_state.jprocessing_complete = True
-    st.success("Processing completed!")
+    if not resume:
+        for checkpoint in checkpoints.values():
+            checkpoint.clear()
+
+    # Bind request settings on the script thread; worker threads cannot read session state
+    infer = partial(
+        run_inference, request=request, required_schema=required_schema, openaiapiurl=openaiapiurl,
+        openapitoken=openapitoken, selected_model=selected_model, session=get_http_session(), timeout=row_timeout
+    )
+
+    # Results are returned in row order, so output rows line up with input rows
+    run_batch = partial(
+        process_columns, df, list(df.columns), infer, max_workers, deduplicate=deduplicate, checkpoints=checkpoints
+    )
+    st.session_state.structured_job_id = job_manager.submit("Processed", run_batch)
+    job = job_manager.get(st.session_state.structured_job_id)
+
+if job is not None and not job.finished:
+    st.subheader("Processing Data...")
+    job_progress(job.id)
+elif job is not None:
+    job_manager.discard(job.id)
+    del st.session_state.structured_job_id
+    if job.status == "completed":
+        processed_columns = {f"{col}_json": results for col, results in job.result.items()}
+        processed_df = pd.DataFrame(processed_columns, index=df.index)
+        st.session_state.jprocessed_df = processed_df
+        st.session_state.jprocessed_df_hash = dataframe_hash(processed_df)
+        st.session_state.jprocessing_complete = True
+        st.success("Processing completed!")
+    elif job.status == "cancelled":
+        resume_hint = " Completed rows are saved; run again with resume to continue." if checkpoints else ""
+        st.warning(f"Processing cancelled.{resume_hint}")
+    else:
+        st.error(f"Processing failed: {job.error}")
 
 # --- Output ---
 if 'jprocessed_df' in st.session_state:
@@ -190,9 +229,13 @@ if 'jprocessed_df' in st.session_state:
     else:
         output_df = processed_df
 
-    display_aggrid(output_df, title="Processed Result")
+    show_grid(output_df, title="Processed Result", key="output_data")
 
     st.subheader("Download Processed Data")
     original_file_name = st.session_state.get("original_file", "processed_data").rsplit('.', 1)[0]
     base_name = f"{original_file_name}_{'appended' if append_mode else 'json'}"
-    download_processed_files(output_df, base_name)
\ No newline at end of file
+    content_hash = export_key(
+        st.session_state.jprocessed_df_hash, st.session_state.get("file_hash", "") if append_mode else "",
+        *map(str, output_df.columns)
+    )
+    download_buttons(output_df, base_name, content_hash)
\ No newline at end of file
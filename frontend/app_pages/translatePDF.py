@@ -5,10 +5,20 @@ from dotenv import load_dotenv
 import os
 import io
 import fitz
+from utils.checkpoint import file_hash
 
 # Use modern Streamlit caching
 cache_function = st.cache_data
 
+PDF_INFO_TTL_SECONDS = int(os.getenv("FRONTEND_PDF_INFO_TTL_SECONDS", "3600"))
+# Backend duration estimates are reused for this long, and abandoned after this timeout
+ESTIMATE_TTL_SECONDS = int(os.getenv("FRONTEND_ESTIMATE_TTL_SECONDS", "60"))
+ESTIMATE_TIMEOUT_SECONDS = float(os.getenv("FRONTEND_ESTIMATE_TIMEOUT_SECONDS", "3"))
+# Copy of SCANNED_PAGE_MAX_CHARS in backend/utils/estimator.py, which defines the estimate features
+SCANNED_PAGE_MAX_CHARS = 20
+# Fallback when the backend has no estimate yet, from empirical data: 96MB = 80 minutes
+SECONDS_PER_MB = 50
+
 @st.dialog("Error!")
 def error_popup(e):
     st.write(f"{e}")
@@ -32,6 +42,42 @@ LANGCODES = [
     ('Urdu'), ('Vietnamese'), ('Yoruba'), ('Zulu')
 ]
 
+@st.cache_data(ttl=PDF_INFO_TTL_SECONDS, max_entries=16, show_spinner=False)
+def get_pdf_info(source_hash, _pdf_file):
+    """Page count, size and layout features, parsed once per file rather than on every rerun.
+
+    Mirrors the backend's `pdf_quick_features` (backend/utils/estimator.py), the reference
+    definition of these features and of SCANNED_PAGE_MAX_CHARS, which records them for
+    finished jobs to fit the duration estimate.
+    """
+    pdf_bytes = _pdf_file.getvalue()
+    scanned_pages = 0
+    text_blocks = 0
+    with fitz.open("pdf", pdf_bytes) as doc:
+        for page in doc:
+            blocks = [block for block in page.get_text("blocks") if block[6] == 0]
+            text_blocks += len(blocks)
+            if sum(len(block[4].strip()) for block in blocks) < SCANNED_PAGE_MAX_CHARS and page.get_images():
+                scanned_pages += 1
+        page_count = len(doc)
+    return {
+        "pages": page_count,
+        "scanned_page_ratio": scanned_pages / page_count if page_count else 0.0,
+        "text_blocks": text_blocks,
+        "file_mb": len(pdf_bytes) / (1024 * 1024),
+    }
+
+@st.cache_data(ttl=ESTIMATE_TTL_SECONDS, max_entries=64, show_spinner=False)
+def fetch_estimate(estimate_url, features, include_tbl_content, model_name):
+    """Backend's predicted duration in seconds, or None if it has too few finished jobs to fit one"""
+    response = requests.post(
+        estimate_url,
+        json={**features, "include_tbl_content": include_tbl_content, "translation_model_name": model_name},
+        timeout=ESTIMATE_TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+    return response.json().get("estimated_seconds")
+
 # Set up the title and language selection
 st.title("PDF Translation Page")
 
@@ -59,21 +105,24 @@ else:
 
     # Display PDF info and time estimation
     def get_pdf_info_and_estimate(pdf_file):
-        """Get page count and estimate processing time based on file size"""
+        """Get page count and estimate processing time from the backend's model of past jobs"""
         try:
-            pdf_bytes = io.BytesIO(pdf_file.getvalue())
-            doc = fitz.open("pdf", pdf_bytes)
-            page_count = len(doc)
-            doc.close()
-
-            # Get file size in MB
-            file_size_bytes = len(pdf_file.getvalue())
-            file_size_mb = file_size_bytes / (1024 * 1024)
-
-            # Time estimation based on empirical data: 96MB = 80 minutes
-            # That's approximately 50 seconds per MB
-            seconds_per_mb = 50
-            estimated_seconds = file_size_mb * seconds_per_mb
+            source_hash = st.session_state.get("file_hash") or file_hash(pdf_file.getvalue())
+            features = get_pdf_info(source_hash, pdf_file)
+            page_count, file_size_mb = features["pages"], features["file_mb"]
+
+            estimated_seconds = None
+            estimate_url = os.getenv("BACKEND_ESTIMATE_URL")
+            if estimate_url:
+                try:
+                    estimated_seconds = fetch_estimate(
+                        estimate_url, features, include_tbl_content, st.session_state.get('selected_model', 'default')
+                    )
+                except requests.exceptions.RequestException:
+                    estimated_seconds = None
+            if estimated_seconds is None:
+                # Too few finished jobs for a fitted estimate, fall back to file size
+                estimated_seconds = file_size_mb * SECONDS_PER_MB
 
             # Convert to human readable format
             if estimated_seconds < 60:
@@ -1,12 +1,16 @@
-import io 
 import requests
 import streamlit as st
 import pandas as pd
-# Replace st_aggrid with st.dataframe if AgGrid causes issues
-from st_aggrid import AgGrid, GridOptionsBuilder
-import time
 import os
-import numpy as np
+from functools import partial
+from utils.batch_runner import (
+    DEFAULT_MAX_WORKERS, DEFAULT_ROW_TIMEOUT, MAX_WORKERS_LIMIT, get_http_session, process_columns
+)
+from utils.checkpoint import column_checkpoints
+from utils.exports import dataframe_hash, download_buttons, export_key
+from utils.grid import show_grid
+from utils.jobs import get_job_manager, job_progress
+from utils.profiler import get_text_columns, profile_columns, workload_caption
 
 # Use modern Streamlit caching
 cache_function = st.cache_data
@@ -18,6 +22,28 @@ def error_popup(e):
     if refresh_button:
         st.rerun()
 
+# Prefix of failed cells' results, followed by the cause
+TRANSLATION_ERROR = "Error in translation"
+
+def translate_cell(text, session, backend_url, input_language, output_language, api_url, api_token, model_name, timeout=DEFAULT_ROW_TIMEOUT):
+    """Translate one cell through the backend (runs on a worker thread, must not touch st.*)"""
+    data = {
+        "text": text,  # Original text to translate
+        "input_language": input_language,  # The language of the original text
+        "output_language": output_language,  # The desired output language
+        "user_prompt": "Translate the following text",  # You can adjust this as needed
+        "url": api_url,  # URL to the OpenAI API
+        "authorization": api_token,  # Authorization token for the OpenAI API
+        "translation_model_name": model_name  # Selected model for translation
+    }
+    try:
+        response = session.post(backend_url, json=data, timeout=timeout)
+        if response.status_code == 200:
+            return response.json().get("translated_text", "")
+        return f"{TRANSLATION_ERROR}: backend returned {response.status_code}: {response.text}"
+    except Exception as e:
+        return f"{TRANSLATION_ERROR}: {e}"
+
 LANGCODES = [
     ('English'), ('Malay (Bahasa Melayu)'), ('Indonesian (Bahasa Indonesia)'), ('Chinese'),
     ('Afrikaans'), ('Arabic'), ('Azerbaijani'), ('Belarusian'), ('Bulgarian'),
@@ -83,21 +109,9 @@ if 'selected_df' not in st.session_state or st.session_state.selected_df is None
                 st.error(f"Error in translation request: {e}")
     
 else:
-    # Display the currently loaded DataFrame using AgGrid or st.dataframe
+    # Display the currently loaded DataFrame, one page at a time
     df = st.session_state.selected_df
-    st.subheader("Loaded DataFrame")
-
-    # If AgGrid causes issues, use st.dataframe instead
-    try:
-        gb = GridOptionsBuilder.from_dataframe(df)
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_side_bar()
-        gb.configure_default_column(wrapText=True, autoHeight=True)
-        grid_options = gb.build()
-
-        AgGrid(df, gridOptions=grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-    except AttributeError:
-        st.dataframe(df)
+    show_grid(df, title="Loaded DataFrame", key="loaded_data", side_bar=True)
 
     # Language selection
     st.subheader("Translation Settings")
@@ -126,6 +140,66 @@ else:
         st.info("Processed output will be saved as a new file.")
 
 
+    # Execution settings
+    st.subheader("Execution Settings")
+    col1, col2 = st.columns(2)
+    with col1:
+        max_workers = st.number_input(
+            "Parallel requests",
+            min_value=1,
+            max_value=MAX_WORKERS_LIMIT,
+            value=DEFAULT_MAX_WORKERS,
+            help="Number of cells translated concurrently. Lower this if the model server is overloaded."
+        )
+    with col2:
+        row_timeout = st.number_input(
+            "Per-cell timeout (seconds)",
+            min_value=1,
+            value=int(DEFAULT_ROW_TIMEOUT),
+            help="Cells that take longer are recorded as errors instead of stalling the run."
+        )
+
+    # Only string columns are translated
+    profile = profile_columns(df, st.session_state.get('file_hash'))
+    text_columns = get_text_columns(profile)
+    deduplicate = st.checkbox(
+        "Translate unique values only",
+        value=False,
+        help="Translate each distinct value once and reuse the result for repeated cells."
+    )
+    st.caption(workload_caption(profile.loc[text_columns], len(df)))
+    with st.expander("Column profile"):
+        st.dataframe(profile)
+
+    # Completed cells are saved to disk while running, so an interrupted run can be resumed
+    checkpoints = column_checkpoints(
+        st.session_state.get('file_hash'),
+        text_columns,
+        prompt=[input_language, output_language],
+        model=st.session_state.get('selected_model'),
+        is_failure=lambda result: isinstance(result, str) and result.startswith(TRANSLATION_ERROR)
+    )
+    saved_cells = sum(checkpoint.count() for checkpoint in checkpoints.values())
+    resume = False
+    if saved_cells:
+        resume = st.checkbox(
+            f"Resume from saved progress ({saved_cells:,} cells already translated)",
+            value=True,
+            help="Only translate the cells that an earlier, interrupted run did not complete."
+        )
+    # Bind request settings on the script thread; worker threads cannot read session state
+    translate = partial(
+        translate_cell,
+        session=get_http_session(),
+        backend_url=os.getenv("BACKEND_TRANSLATE_URL"),
+        input_language=input_language,
+        output_language=output_language,
+        api_url=st.session_state.get('openaiapiurl'),
+        api_token=st.session_state.get('openapitoken'),
+        model_name=st.session_state.get('selected_model'),
+        timeout=row_timeout
+    )
+
     # if st.button("Preview"):
     #     # Generate a preview with random rows for each column
     #     breakflag = False
@@ -214,45 +288,15 @@ else:
         preview_df = df.sample(n=sample_size)
         preview_data = {}
 
-        # Process all columns
+        # Translate the sampled cells of all string columns concurrently
+        translations = process_columns(
+            preview_df[text_columns].fillna(""), text_columns, translate, max_workers, deduplicate=deduplicate
+        )
+
         for column in df.columns:
-            if df[column].dtype == 'object' and df[column].apply(lambda x: isinstance(x, str) or pd.isna(x)).all():
-                # Ensure NaN values are handled before translation
-                # st.write(f"Processing column: {column}")
-                translated_column_name = f"{column}_translated"
-                preview_data[column] = preview_df[column].fillna("").tolist()  # Replace NaN with empty string
-
-                # Translate only string columns
-                translated_texts = []
-                for text in preview_df[column].fillna(""):  # Ensure NaN is replaced with empty string for translation
-                    # st.write(f"Translating: {text}") 
-                    # Call the FastAPI backend to get translation
-                    url = os.getenv("BACKEND_TRANSLATE_URL")
-                    headers = {"Content-Type": "application/json"}
-                    data = {
-                        "text": text,  # Original text to translate
-                        "input_language": input_language,  # The language of the original text
-                        "output_language": output_language,  # The desired output language
-                        "user_prompt": "Translate the following text",  # You can adjust this as needed
-                        "url": st.session_state.openaiapiurl,  # URL to the OpenAI API
-                        "authorization": st.session_state.openapitoken,  # Authorization token for the OpenAI API
-                        "translation_model_name": st.session_state['selected_model']  # Selected model for translation
-                    }
-
-                    response = requests.post(url, json=data, headers=headers)
-
-                    if response.status_code == 200:
-                        translated_text = response.json().get("translated_text", "")
-                        # st.write(translated_text)
-                        translated_texts.append(translated_text)
-                    else:
-                        translated_texts.append("Error in translation")
-
-                preview_data[translated_column_name] = translated_texts  # Add translated column
-
-            else:
-                # Directly add non-string columns without translation
-                preview_data[column] = preview_df[column].fillna("").tolist()  # Replace NaN with empty string
+            preview_data[column] = preview_df[column].fillna("").tolist()  # Replace NaN with empty string
+            if column in text_columns:
+                preview_data[f"{column}_translated"] = translations[column]
 
         if not breakflag:
             st.subheader("Translation Preview")
@@ -266,107 +310,62 @@ else:
                 interleaved_columns.append(column)
 
                 # For string columns, add the translated column if it exists
-                if df[column].dtype == 'object' and df[column].apply(lambda x: isinstance(x, str) or pd.isna(x)).all():
+                if column in text_columns:
                     translated_column_name = f"{column}_translated"
                     interleaved_columns.append(translated_column_name)
 
             # Create the preview DataFrame with all original columns + translated columns where applicable
             preview_result = pd.DataFrame(preview_data)[interleaved_columns]
 
-            # Display the preview using AgGrid or st.dataframe
-            st.subheader("Preview Result")
-            try:
-                gb_preview = GridOptionsBuilder.from_dataframe(preview_result)
-                gb_preview.configure_pagination(paginationAutoPageSize=True)
-                gb_preview.configure_default_column(wrapText=True, autoHeight=True)
-                preview_grid_options = gb_preview.build()
-
-                AgGrid(preview_result, gridOptions=preview_grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-            except AttributeError:
-                st.dataframe(preview_result)
+            show_grid(preview_result, title="Preview Result", key="preview_result")
 
 
-    if st.button("Run"):
-        # Run the full translation and generate a translated DataFrame
-        st.subheader("Translating Data...")
-
-        translated_data = {}
-        total_texts = len(df) * len(df.columns)
-        progress = st.progress(0)
-        progress_counter = 0
-        timestart = time.time()
-        
-        # Timer display
-        timer_display = st.empty()  # To dynamically update the time
-        
-        # List to store the interleaved column names (original + translated)
-        interleaved_columns = []
+    # The full translation runs as a background job, so reruns do not interrupt it
+    job_manager = get_job_manager()
+    job = job_manager.get(st.session_state.get('translate_job_id'))
+    if st.button("Run", disabled=job is not None and not job.finished):
+        if not resume:
+            for checkpoint in checkpoints.values():
+                checkpoint.clear()
 
-        for column in df.columns:
-            if df[column].dtype == 'object' and df[column].apply(lambda x: isinstance(x, str) or pd.isna(x)).all():
-            # if df[column].dtype == 'object' and pd.api.types.is_string_dtype(df[column]):
-                print(f"Processing column: {column}")
-                translated_column_name = f"{column}_translated"
+        # Translate all string columns concurrently, keeping results in row order
+        run_translation = partial(
+            process_columns, df[text_columns].fillna(""), text_columns, translate, max_workers,
+            deduplicate=deduplicate, checkpoints=checkpoints
+        )
+        st.session_state.translate_job_id = job_manager.submit("Translated", run_translation)
+        job = job_manager.get(st.session_state.translate_job_id)
 
-                # translated_data[column] = df[column].tolist()  # Add the original column data
-                translated_data[column] = df[column].fillna("").tolist() 
-                translations = []
-                
-                # Translate only string columns
-                # for text in df[column]:
-                for text in df[column].fillna(""): 
-                    # Call the FastAPI backend to get translation
-                    # url = f"http://localhost:8000/translate"
-                    url = os.getenv("BACKEND_TRANSLATE_URL")
-                    headers = {"Content-Type": "application/json"}
-                    # print(text)
-                    data = {
-                        "text": text,  # Original text to translate
-                        "input_language": input_language,  # The language of the original text
-                        "output_language": output_language,  # The desired output language
-                        "user_prompt": "Translate the following text",  # You can adjust this as needed
-                        "url": st.session_state.openaiapiurl,  # URL to the OpenAI API
-                        "authorization": st.session_state.openapitoken,  # Authorization token for the OpenAI API
-                        "translation_model_name": st.session_state['selected_model']  # Selected model for translation
-                    }
-
-                    response = requests.post(url, json=data, headers=headers)
-                    
-                    if response.status_code == 200:
-                        translated_text = response.json().get("translated_text", "")
-                        translations.append(translated_text)
-                    else:
-                        translations.append("Error in translation")
-
-                    progress_counter += 1
-                    progress.progress(progress_counter / total_texts)
-
-                translated_data[translated_column_name] = translations
-            else:
-                # translated_data[column] = df[column].tolist()
-                translated_data[column] = df[column].fillna("").tolist() 
-
-
-        st.subheader("Translation Result")
-        
-        # List to store the interleaved column names (original + translated)
-        interleaved_columns = []
-
-        # Iterate through each column in the dataframe
-        for column in df.columns:
-            # Add the original column to the list first
-            interleaved_columns.append(column)
+    if job is not None and not job.finished:
+        st.subheader("Translating Data...")
+        job_progress(job.id)
+    elif job is not None:
+        job_manager.discard(job.id)
+        del st.session_state.translate_job_id
+        if job.status == "completed":
+            translations = job.result
+            translated_data = {}
+            for column in df.columns:
+                translated_data[column] = df[column].fillna("").tolist()
+                if column in text_columns:
+                    translated_data[f"{column}_translated"] = translations[column]
 
-            # For string columns, add the translated column if it exists
-            # if df[column].dtype == 'object' and pd.api.types.is_string_dtype(df[column]):
-            if df[column].dtype == 'object' and df[column].apply(lambda x: isinstance(x, str) or pd.isna(x)).all():
-                translated_column_name = f"{column}_translated"
-                interleaved_columns.append(translated_column_name)
+            # List to store the interleaved column names (original + translated)
+            interleaved_columns = []
+            for column in df.columns:
+                interleaved_columns.append(column)
+                if column in text_columns:
+                    interleaved_columns.append(f"{column}_translated")
 
-        # Create the preview DataFrame with all original columns + translated columns where applicable
-        preview_result = pd.DataFrame(translated_data)[interleaved_columns]
-        st.session_state.preview_result = preview_result
-        progress.progress(1.0)
+            # Create the preview DataFrame with all original columns + translated columns where applicable
+            st.session_state.preview_result = pd.DataFrame(translated_data)[interleaved_columns]
+            st.session_state.preview_result_hash = dataframe_hash(st.session_state.preview_result)
+            st.success("Translation completed!")
+        elif job.status == "cancelled":
+            resume_hint = " Completed cells are saved; run again with resume to continue." if checkpoints else ""
+            st.warning(f"Translation cancelled.{resume_hint}")
+        else:
+            st.error(f"Translation failed: {job.error}")
 
     if 'preview_result' in st.session_state:
         preview_result = st.session_state.preview_result
@@ -387,15 +386,7 @@ else:
             output_df = preview_result
             # st.session_state.output_df = output_df
 
-        try:
-            gb_preview = GridOptionsBuilder.from_dataframe(output_df)
-            gb_preview.configure_pagination(paginationAutoPageSize=True)
-            gb_preview.configure_default_column(wrapText=True, autoHeight=True)
-            preview_grid_options = gb_preview.build()
-
-            AgGrid(output_df, gridOptions=preview_grid_options, enable_enterprise_modules=False, theme="streamlit", fit_columns_on_grid_load=True)
-        except AttributeError:
-            st.dataframe(output_df)
+        show_grid(output_df, key="output_data")
 
     # if 'output_df' in st.session_state:
     #     output_df = st.session_state.output_df
@@ -403,51 +394,15 @@ else:
         # Provide download options
         st.subheader("Download Translated Data")
 
-        # Convert DataFrame to various formats
-        csv_buffer = output_df.to_csv(index=False).encode('utf-8')
-        # json_buffer = output_df.to_json(orient='records', indent=2).encode('utf-8')
-        safe_output_df = output_df.replace({np.nan: None})  # Convert NaN to None for JSON serialization
-        json_buffer = safe_output_df.to_json(orient='records', indent=2).encode('utf-8')
-
-
-        # Create an Excel file in-memory
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-            output_df.to_excel(writer, index=False, sheet_name='Translated_Data')
-            # The context manager saves the file automatically
-
         # Prepare file name based on original file name and append mode
         if 'original_file' in st.session_state and st.session_state.original_file:
             original_file_name = st.session_state.original_file.rsplit('.', 1)[0]
         else:
             original_file_name = 'translated_data'
 
-        if append_mode:
-            csv_file_name = f"{original_file_name}_appended.csv"
-            json_file_name = f"{original_file_name}_appended.json"
-            excel_file_name = f"{original_file_name}_appended.xlsx"
-        else:
-            csv_file_name = f"{original_file_name}_translated.csv"
-            json_file_name = f"{original_file_name}_translated.json"
-            excel_file_name = f"{original_file_name}_translated.xlsx"
-
-        # Add download buttons
-        st.download_button(
-            label="Download as CSV",
-            data=csv_buffer,
-            file_name=csv_file_name,
-            mime="text/csv"
-        )
-        st.download_button(
-            label="Download as JSON",
-            data=json_buffer,
-            file_name=json_file_name,
-            mime="application/json"
+        suffix = "appended" if append_mode else "translated"
+        content_hash = export_key(
+            st.session_state.preview_result_hash, st.session_state.get("file_hash", "") if append_mode else "",
+            suffix, *map(str, output_df.columns)
         )
-        st.download_button(
-            label="Download as Excel",
-            data=excel_buffer.getvalue(),
-            file_name=excel_file_name,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-
+        download_buttons(output_df, f"{original_file_name}_{suffix}", content_hash, sheet_name='Translated_Data')
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from .checkpoint import ColumnCheckpoint
+
+DEFAULT_MAX_WORKERS = int(os.getenv("FRONTEND_MAX_WORKERS", "8"))
+MAX_WORKERS_LIMIT = int(os.getenv("FRONTEND_MAX_WORKERS_LIMIT", "64"))
+# Per-row request timeout (seconds) so one stuck row cannot stall a whole run
+DEFAULT_ROW_TIMEOUT = float(os.getenv("FRONTEND_ROW_TIMEOUT", "600"))
+
+
+@st.cache_resource
+def get_http_session(pool_size: int = MAX_WORKERS_LIMIT) -> requests.Session:
+    """Shared HTTP session so worker threads reuse keep-alive connections to the backend"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def format_duration(seconds: float) -> str:
+    """Human readable duration, e.g. 45s, 12m 5s, 2h 3m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+
+class BatchCancelled(Exception):
+    """Raised by BatchRunner.run when its cancel event is set"""
+
+
+def capture_error(error: Exception) -> str:
+    """Default per-row error result, so one failing row does not abort the run"""
+    return f"Error: {error}"
+
+
+class BatchRunner:
+    """Run a function over many items on a thread pool, returning results in input order.
+
+    Items are submitted through a bounded window of in-flight futures, so memory for
+    pending work stays proportional to the window rather than to the number of items.
+    Progress callbacks run on the calling (Streamlit script) thread, so they may update
+    widgets; `func` runs on worker threads and must not touch `st.*` or session state.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        window: Optional[int] = None,
+        on_error: Callable[[Exception], Any] = capture_error
+    ):
+        self.max_workers = max(1, min(max_workers, MAX_WORKERS_LIMIT))
+        self.window = window or self.max_workers * 4
+        self.on_error = on_error
+
+    def run(
+        self,
+        func: Callable[[Any], Any],
+        items: Iterable[Any],
+        on_progress: Optional[Callable[[int, int, float], None]] = None,
+        total: Optional[int] = None,
+        on_result: Optional[Callable[[int, Any, bool], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> List[Any]:
+        """Return `func(item)` for every item in input order.
+
+        `on_result(index, result, succeeded)` is called on the calling thread as each item
+        completes, e.g. to persist results incrementally. Once `cancel_event` is set no new
+        items are started, and BatchCancelled is raised after in-flight items finish.
+        """
+        if total is None:
+            items = items if hasattr(items, "__len__") else list(items)
+            total = len(items)
+        results: List[Any] = [None] * total
+        iterator = enumerate(items)
+        start = time.time()
+        completed = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+
+            def submit_next() -> None:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                entry = next(iterator, None)
+                if entry is not None:
+                    index, item = entry
+                    in_flight[executor.submit(func, item)] = index
+
+            for _ in range(self.window):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    succeeded = True
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        results[index] = self.on_error(e)
+                        succeeded = False
+                    if on_result:
+                        on_result(index, results[index], succeeded)
+                    completed += 1
+                    submit_next()
+                if on_progress:
+                    on_progress(completed, total, time.time() - start)
+
+        if cancel_event is not None and cancel_event.is_set() and completed < total:
+            raise BatchCancelled(f"Cancelled after {completed} of {total} items")
+        return results
+
+
+def process_columns(
+    df,
+    columns: List[str],
+    func: Callable[[Any], Any],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    on_progress: Optional[Callable[[int, int, float], None]] = None,
+    deduplicate: bool = False,
+    checkpoints: Optional[Dict[str, ColumnCheckpoint]] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, List[Any]]:
+    """Apply `func` to every cell of the given columns concurrently, returning {column: results} in row order.
+
+    With `deduplicate`, each distinct value of a column (NaN included) is processed once
+    and the results are mapped back onto the rows. With `checkpoints` ({column: checkpoint}),
+    cells already saved by an earlier run are reused and new results are saved as they complete.
+    """
+    checkpoints = checkpoints or {}
+    plans = []
+    for column in columns:
+        if deduplicate:
+            codes, values = pd.factorize(df[column], use_na_sentinel=False)
+            # Codes follow order of first appearance, so this is the first row of each value
+            positions = np.unique(codes, return_index=True)[1]
+        else:
+            codes, values = None, df[column].to_numpy()
+            positions = np.arange(len(values))
+        results = np.empty(len(values), dtype=object)
+        saved = checkpoints[column].load() if column in checkpoints else {}
+        pending = []
+        for unit, position in enumerate(positions):
+            if int(position) in saved:
+                results[unit] = saved[int(position)]
+            else:
+                pending.append(unit)
+        plans.append((column, codes, values, positions, results, pending))
+
+    # Start offset of each column's pending cells in the flattened work list
+    offsets = np.cumsum([0] + [len(plan[5]) for plan in plans])
+
+    def save_result(index: int, result: Any, succeeded: bool) -> None:
+        plan_index = int(np.searchsorted(offsets, index, side="right")) - 1
+        column, _, _, positions, _, pending = plans[plan_index]
+        if succeeded and column in checkpoints:
+            checkpoints[column].add(positions[pending[index - offsets[plan_index]]], result)
+
+    cells = (values[unit] for _, _, values, _, _, pending in plans for unit in pending)
+    try:
+        flat = BatchRunner(max_workers).run(
+            func, cells, on_progress, total=int(offsets[-1]), on_result=save_result if checkpoints else None,
+            cancel_event=cancel_event
+        )
+    finally:
+        for checkpoint in checkpoints.values():
+            checkpoint.flush()
+
+    output = {}
+    for (column, codes, _, _, results, pending), offset in zip(plans, offsets):
+        for i, unit in enumerate(pending):
+            results[unit] = flat[offset + i]
+        output[column] = (results if codes is None else results[codes]).tolist()
+    return output
+
+
+def progress_message(label: str, done: int, total: int, elapsed: float) -> str:
+    """Progress line with throughput and ETA, e.g. "Processed 10/100 | 2.0 items/s | ..." """
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else 0.0
+    return (
+        f"{label} {done}/{total} | {rate:.1f} items/s | "
+        f"Elapsed: {format_duration(elapsed)} | ETA: {format_duration(eta)}"
+    )
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+CHECKPOINT_DIR = os.getenv(
+    "FRONTEND_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "digitalisation_toolkit_checkpoints")
+)
+# Results are written to disk every this many completed cells
+CHECKPOINT_CHUNK_SIZE = int(os.getenv("FRONTEND_CHECKPOINT_CHUNK_SIZE", "50"))
+CHECKPOINT_TTL_HOURS = float(os.getenv("FRONTEND_CHECKPOINT_TTL_HOURS", "72"))
+
+
+def file_hash(data: bytes) -> str:
+    """Content hash identifying an uploaded file across reruns and sessions"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def checkpoint_key(source_hash: str, column: str, prompt: Any, model: Optional[str]) -> str:
+    """Key of one column's results, changing whenever the input file, prompt or model changes"""
+    payload = json.dumps([source_hash, column, prompt, model], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def get_checkpoint_dir(directory: str = CHECKPOINT_DIR, ttl_hours: float = CHECKPOINT_TTL_HOURS) -> str:
+    """Create the checkpoint directory and drop checkpoints older than the TTL (once per process)"""
+    os.makedirs(directory, exist_ok=True)
+    cutoff = time.time() - ttl_hours * 3600
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+    return directory
+
+
+class ColumnCheckpoint:
+    """Append-only on-disk record of the processed cells of one column.
+
+    Each line is `[row position, result]`. Results are buffered and appended once per
+    chunk, so a rerun, refresh or crash loses at most one chunk of work. Failed cells
+    are not recorded, so resuming retries them.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        directory: Optional[str] = None,
+        chunk_size: int = CHECKPOINT_CHUNK_SIZE,
+        is_failure: Optional[Callable[[Any], bool]] = None
+    ):
+        self.path = os.path.join(directory or get_checkpoint_dir(), f"{key}.jsonl")
+        self.chunk_size = max(1, chunk_size)
+        self.is_failure = is_failure
+        self._buffer: List[str] = []
+
+    def load(self) -> Dict[int, Any]:
+        saved = {}
+        if not os.path.exists(self.path):
+            return saved
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    position, result = json.loads(line)
+                except ValueError:
+                    # Partially written last line from an interrupted flush
+                    continue
+                saved[int(position)] = result
+        return saved
+
+    def count(self) -> int:
+        """Number of saved cells, without decoding them"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def add(self, position: int, result: Any) -> None:
+        if self.is_failure and self.is_failure(result):
+            return
+        self._buffer.append(json.dumps([int(position), result], ensure_ascii=False, default=str))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer = []
+
+    def clear(self) -> None:
+        self._buffer = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def column_checkpoints(
+    source_hash: Optional[str],
+    columns: List[str],
+    prompt: Any,
+    model: Optional[str],
+    is_failure: Optional[Callable[[Any], bool]] = None
+) -> Dict[str, ColumnCheckpoint]:
+    """Checkpoints for each column of a run, or none if the source file hash is unknown"""
+    if not source_hash:
+        return {}
+    return {
+        column: ColumnCheckpoint(checkpoint_key(source_hash, column, prompt, model), is_failure=is_failure)
+        for column in columns
+    }
@@ -0,0 +1,112 @@
+import os
+from typing import Hashable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import streamlit as st
+
+# Rows parsed per chunk when reading CSV files
+CSV_CHUNK_ROWS = int(os.getenv("FRONTEND_CSV_CHUNK_ROWS", "100000"))
+# Parsed tables kept in memory, shared by all sessions working on the same file
+TABLE_CACHE_ENTRIES = int(os.getenv("FRONTEND_TABLE_CACHE_ENTRIES", "4"))
+
+# Arrow-backed strings take a fraction of the memory of Python string objects
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+TABULAR_EXTENSIONS = ["csv", "xlsx", "parquet", "feather", "arrow"]
+ARROW_EXTENSIONS = (".feather", ".arrow")
+
+
+def _arrow_source(uploaded_file) -> pa.BufferReader:
+    """Arrow reader over the upload's bytes; uncompressed Feather columns reference them without copying"""
+    return pa.BufferReader(pa.py_buffer(uploaded_file.getvalue()))
+
+
+def _arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    types = {pa.string(): TEXT_DTYPE, pa.large_string(): TEXT_DTYPE}
+    return table.to_pandas(types_mapper=types.get, self_destruct=True)
+
+
+def read_header(uploaded_file) -> List[Hashable]:
+    """Column labels of a tabular upload, without parsing the rows.
+
+    Labels are the ones pandas gives the parsed table (e.g. numeric Excel headers stay
+    numbers, blank ones become "Unnamed: N", duplicates get ".1" suffixes), so they can
+    be passed back to read_rows.
+    """
+    if uploaded_file.name.endswith(".parquet"):
+        return pq.read_schema(_arrow_source(uploaded_file)).names
+    if uploaded_file.name.endswith(ARROW_EXTENSIONS):
+        return feather.read_table(_arrow_source(uploaded_file), memory_map=False).schema.names
+    uploaded_file.seek(0)
+    if uploaded_file.name.endswith(".xlsx"):
+        return pd.read_excel(uploaded_file, nrows=0).columns.tolist()
+    return pd.read_csv(uploaded_file, nrows=0).columns.tolist()
+
+
+def compact_text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Store columns holding only strings (and missing values) as Arrow-backed strings"""
+    for column in df.columns:
+        series = df[column]
+        if series.dtype == "object" and pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+            df[column] = series.astype(TEXT_DTYPE)
+    return df
+
+
+def read_rows(uploaded_file, columns: Optional[List[Hashable]] = None, nrows: Optional[int] = None) -> pd.DataFrame:
+    """Parse the given columns (all if None) of a tabular upload.
+
+    Parquet and Feather files are read column-wise straight into Arrow-backed columns.
+    CSV files are parsed in chunks and each chunk's text columns are converted to
+    Arrow-backed strings before the next is read, so peak memory stays close to the
+    size of the result rather than that of an all-object DataFrame.
+    """
+    if uploaded_file.name.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(_arrow_source(uploaded_file))
+        if nrows is None:
+            return _arrow_to_pandas(parquet_file.read(columns=columns))
+        batch = next(parquet_file.iter_batches(batch_size=nrows, columns=columns), None)
+        table = pa.Table.from_batches([batch]) if batch is not None else parquet_file.schema_arrow.empty_table()
+        return _arrow_to_pandas(table)
+    if uploaded_file.name.endswith(ARROW_EXTENSIONS):
+        table = feather.read_table(_arrow_source(uploaded_file), columns=columns, memory_map=False)
+        return _arrow_to_pandas(table if nrows is None else table.slice(0, nrows))
+
+    uploaded_file.seek(0)
+    if uploaded_file.name.endswith(".xlsx"):
+        # Select after parsing: usecols would read integer labels as positions and does not
+        # know the names pandas gives blank or duplicate headers
+        df = pd.read_excel(uploaded_file, nrows=nrows)
+        if columns is not None:
+            # A shallow copy detaches the selection, so its columns can be replaced without a warning
+            df = df[columns].copy(deep=False)
+        return compact_text_columns(df)
+
+    with pd.read_csv(uploaded_file, usecols=columns, nrows=nrows, chunksize=CSV_CHUNK_ROWS) as reader:
+        chunks = [compact_text_columns(chunk) for chunk in reader]
+    if not chunks:
+        uploaded_file.seek(0)
+        return pd.read_csv(uploaded_file, usecols=columns, nrows=0)
+
+    # A text column parses as float in chunks where it is empty; align dtypes before concatenating
+    text_columns = {column for chunk in chunks for column in chunk.columns if chunk[column].dtype == TEXT_DTYPE}
+    chunks = [
+        chunk.astype({column: TEXT_DTYPE for column in text_columns if chunk[column].dtype != TEXT_DTYPE})
+        for chunk in chunks
+    ]
+    df = pd.concat(chunks, ignore_index=True)
+    # usecols keeps file order; keep the order the columns were selected in
+    return df[columns] if columns is not None else df
+
+
+@st.cache_resource(max_entries=TABLE_CACHE_ENTRIES, show_spinner="Loading data...")
+def load_table(file_hash: str, columns: Optional[tuple], _uploaded_file) -> pd.DataFrame:
+    """Parsed table for a file hash and column selection.
+
+    Cached as a shared resource rather than with st.cache_data, which would hand every
+    rerun its own copy of a potentially multi-gigabyte DataFrame. Callers must not
+    modify the returned frame in place.
+    """
+    return read_rows(_uploaded_file, list(columns) if columns is not None else None)
@@ -0,0 +1,192 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import streamlit as st
+import xlsxwriter
+
+EXPORT_DIR = os.getenv("FRONTEND_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "digitalisation_toolkit_exports"))
+EXPORT_TTL_HOURS = float(os.getenv("FRONTEND_EXPORT_TTL_HOURS", "24"))
+# Prepared export files remembered per process, across sessions
+EXPORT_CACHE_ENTRIES = int(os.getenv("FRONTEND_EXPORT_CACHE_ENTRIES", "16"))
+# Rows serialized at a time by the CSV and JSON writers
+EXPORT_CHUNK_ROWS = int(os.getenv("FRONTEND_EXPORT_CHUNK_ROWS", "10000"))
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow table for columnar exports; mixed-type object columns are written as strings"""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns:
+            series = df[column]
+            if series.dtype == "object":
+                df[column] = series.where(series.isna(), series.astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def dataframe_hash(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame's columns and values, used to reuse exports across reruns"""
+    digest = hashlib.sha256(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    for column in df.columns:
+        series = df[column]
+        try:
+            hashed = pd.util.hash_pandas_object(series, index=False)
+        except TypeError:
+            # Unhashable cells such as dicts
+            hashed = pd.util.hash_pandas_object(series.astype(str), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def export_key(result_hash: str, *parts: str) -> str:
+    """Key for an export built from a stored result: its content hash plus whatever else shaped the output
+    (source file, append mode, columns), so download_buttons never has to hash the output itself"""
+    return hashlib.sha256("\0".join((result_hash, *parts)).encode("utf-8")).hexdigest()
+
+
+def _row_chunks(df: pd.DataFrame):
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        yield df.iloc[start:start + EXPORT_CHUNK_ROWS]
+
+
+def write_csv(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    df.to_csv(path, index=False, chunksize=EXPORT_CHUNK_ROWS)
+
+
+def write_json(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    """Indented JSON records, serialized one chunk of rows at a time"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for index, chunk in enumerate(_row_chunks(df)):
+            # Convert NaN to None for JSON serialization
+            records = chunk.replace({np.nan: None}).to_json(orient="records", indent=2)
+            f.write(("," if index else "") + records[1:-1].rstrip())
+        f.write("\n]" if len(df) else "]")
+
+
+def write_excel(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    """Write row by row in xlsxwriter's constant-memory mode, which flushes each row to disk"""
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        for row, values in enumerate(df.itertuples(index=False, name=None), 1):
+            for column, value in enumerate(values):
+                value = _excel_value(value)
+                if isinstance(value, (datetime.datetime, datetime.date)):
+                    worksheet.write_datetime(row, column, value, date_format)
+                else:
+                    worksheet.write(row, column, value)
+    finally:
+        workbook.close()
+
+
+def _excel_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime.datetime, datetime.date)) and getattr(value, "tzinfo", None) is None:
+        return value
+    return str(value)
+
+
+def write_parquet(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    pq.write_table(to_arrow_table(df), path, compression="zstd")
+
+
+def write_feather(df: pd.DataFrame, path: str, sheet_name: str) -> None:
+    feather.write_feather(to_arrow_table(df), path, compression="zstd")
+
+
+# Download format -> (file extension, MIME type, writer)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, Callable[[pd.DataFrame, str, str], None]]] = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "JSON": ("json", "application/json", write_json),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_excel),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+    "Feather": ("feather", "application/vnd.apache.arrow.file", write_feather),
+}
+
+
+@st.cache_resource
+def get_export_dir(directory: str = EXPORT_DIR, ttl_hours: float = EXPORT_TTL_HOURS) -> str:
+    """Create the export directory and drop exports older than the TTL (once per process)"""
+    os.makedirs(directory, exist_ok=True)
+    cutoff = time.time() - ttl_hours * 3600
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+    return directory
+
+
+@st.cache_resource(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def export_file(content_hash: str, export_format: str, sheet_name: str, _df: pd.DataFrame) -> str:
+    """Write an export to a file on disk, once per (content, format, sheet name)"""
+    extension, _, writer = EXPORT_FORMATS[export_format]
+    path = os.path.join(get_export_dir(), f"{content_hash}_{sheet_name}.{extension}")
+    # Write under a temporary name so a partially written file is never served
+    partial_path = f"{path}.partial"
+    writer(_df, partial_path, sheet_name)
+    os.replace(partial_path, path)
+    return path
+
+
+def download_buttons(
+    df: pd.DataFrame, base_name: str, content_hash: str, sheet_name: str = "Processed_Data", key: str = "export"
+) -> None:
+    """Let the user pick a format and prepare it on demand, instead of serializing every format on each rerun.
+
+    `content_hash` identifies the content of `df`. Callers compute it once, when the result is
+    produced, and keep it in session state, so reruns do not hash the whole frame again.
+    Exports are written to disk a chunk of rows at a time and cached there per content
+    hash and format. They are not streamed to the browser: while a prepared export is
+    shown, st.download_button is handed the whole file on every rerun.
+    """
+    export_format = st.selectbox("Download format", list(EXPORT_FORMATS), key=f"{key}_format")
+    prepared: Optional[Tuple[str, str, str]] = st.session_state.get(f"{key}_prepared")
+
+    if st.button("Prepare download", key=f"{key}_prepare"):
+        with st.spinner(f"Preparing {export_format} file..."):
+            path = export_file(content_hash, export_format, sheet_name, df)
+            if not os.path.exists(path):
+                # Removed from disk after it was cached
+                export_file.clear()
+                path = export_file(content_hash, export_format, sheet_name, df)
+        prepared = st.session_state[f"{key}_prepared"] = (content_hash, export_format, path)
+    elif prepared is not None and (
+        prepared[1] != export_format or prepared[0] != content_hash or not os.path.exists(prepared[2])
+    ):
+        # Prepared for another format or an earlier result
+        prepared = st.session_state[f"{key}_prepared"] = None
+
+    if prepared is not None:
+        extension, mime, _ = EXPORT_FORMATS[export_format]
+        # st.download_button reads the whole file into memory; only the preparation step is cached
+        with open(prepared[2], "rb") as f:
+            st.download_button(
+                label=f"Download as {export_format}",
+                data=f,
+                file_name=f"{base_name}.{extension}",
+                mime=mime,
+                key=f"{key}_download"
+            )
@@ -0,0 +1,62 @@
+import json
+import math
+import os
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder
+
+# Rows sent to the browser per page
+GRID_PAGE_SIZE = int(os.getenv("FRONTEND_GRID_PAGE_SIZE", "100"))
+# Above this many rows cells are not wrapped/auto-sized, which is costly to lay out in the browser
+GRID_AUTO_HEIGHT_MAX_ROWS = int(os.getenv("FRONTEND_GRID_AUTO_HEIGHT_MAX_ROWS", "1000"))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def grid_options(columns: tuple, dtypes: tuple, auto_height: bool, side_bar: bool, _sample: pd.DataFrame) -> dict:
+    """Grid options for a column layout, built once rather than on every rerun"""
+    gb = GridOptionsBuilder.from_dataframe(_sample)
+    if side_bar:
+        gb.configure_side_bar()
+    gb.configure_default_column(wrapText=auto_height, autoHeight=auto_height)
+    # The builder returns nested defaultdicts, which st.cache_data cannot pickle
+    return json.loads(json.dumps(gb.build()))
+
+
+def show_grid(df: pd.DataFrame, title: Optional[str] = None, key: str = "grid", side_bar: bool = False) -> None:
+    """Render a DataFrame one page at a time; only the visible page is sent to the browser"""
+    if title:
+        st.subheader(title)
+
+    total_rows = len(df)
+    page_count = max(1, math.ceil(total_rows / GRID_PAGE_SIZE))
+    page = 1
+    if page_count > 1:
+        # Keyed by page count so a smaller frame does not inherit an out-of-range page
+        page = st.number_input(
+            f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, key=f"{key}_page_{page_count}"
+        )
+    start = (page - 1) * GRID_PAGE_SIZE
+    page_df = df.iloc[start:start + GRID_PAGE_SIZE]
+    if page_count > 1:
+        st.caption(f"Rows {start + 1:,}–{start + len(page_df):,} of {total_rows:,}")
+
+    options = grid_options(
+        tuple(str(column) for column in df.columns),
+        tuple(str(dtype) for dtype in df.dtypes),
+        total_rows <= GRID_AUTO_HEIGHT_MAX_ROWS,
+        side_bar,
+        df.head(0)
+    )
+    try:
+        AgGrid(
+            page_df,
+            gridOptions=options,
+            enable_enterprise_modules=False,
+            theme="streamlit",
+            fit_columns_on_grid_load=True,
+            key=key
+        )
+    except Exception:
+        st.dataframe(page_df)
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import streamlit as st
+
+from .batch_runner import BatchCancelled, progress_message
+
+# How often a page refreshes the status of a running job (seconds)
+JOB_POLL_INTERVAL = float(os.getenv("FRONTEND_JOB_POLL_INTERVAL", "1.0"))
+# Finished jobs whose results were never collected are dropped after this long (seconds)
+JOB_RETENTION_SECONDS = float(os.getenv("FRONTEND_JOB_RETENTION_SECONDS", "3600"))
+
+
+class BatchJob:
+    """A batch run executing on its own thread, independent of any Streamlit script run"""
+
+    def __init__(self, label: str, target: Callable[..., Any]):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.status = "running"
+        self.done = 0
+        self.total = 0
+        self.elapsed = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self._target = target
+        self._thread = threading.Thread(target=self._run, name=f"batch-job-{self.id[:8]}", daemon=True)
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def update_progress(self, done: int, total: int, elapsed: float) -> None:
+        self.done, self.total, self.elapsed = done, total, elapsed
+
+    def _run(self) -> None:
+        status = "failed"
+        try:
+            self.result = self._target(on_progress=self.update_progress, cancel_event=self.cancel_event)
+            status = "completed"
+        except BatchCancelled:
+            status = "cancelled"
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            # Set last: readers on other threads treat any status but "running" as finished
+            self.status = status
+
+
+class JobManager:
+    """Process-wide registry of batch jobs.
+
+    Pages keep only the job id in session state; inputs and results are held here until
+    the page collects them, so widget interaction and reruns do not interrupt the work.
+    """
+
+    def __init__(self, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, BatchJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, label: str, target: Callable[..., Any]) -> str:
+        """Start `target(on_progress=..., cancel_event=...)` in the background and return the job id"""
+        job = BatchJob(label, target)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.start()
+        return job.id
+
+    def get(self, job_id: Optional[str]) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    return JobManager()
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def job_progress(job_id: str) -> None:
+    """Poll a running job, rerunning the whole page once it has finished"""
+    job = get_job_manager().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(job.done / job.total if job.total else 0.0)
+    st.text(progress_message(job.label, job.done, job.total, job.elapsed))
+    if st.button("Cancel", key=f"cancel_{job_id}", disabled=job.cancel_event.is_set()):
+        get_job_manager().cancel(job_id)
+    if job.cancel_event.is_set():
+        st.caption("Cancelling: waiting for in-flight requests to finish...")
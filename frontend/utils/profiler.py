@@ -0,0 +1,62 @@
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from .exports import dataframe_hash
+
+# infer_dtype results for columns holding only strings (and missing values)
+TEXT_TYPES = ("string", "empty")
+
+
+def _profile_column(series: pd.Series) -> dict:
+    total = len(series)
+    non_null = int(series.count())
+    inferred_type = pd.api.types.infer_dtype(series, skipna=True)
+    is_text = inferred_type in TEXT_TYPES
+    unique_count = int(series.nunique(dropna=False))
+    average_length = float(series.str.len().mean()) if is_text and non_null else 0.0
+    return {
+        "inferred_type": inferred_type,
+        "is_text": is_text,
+        "null_ratio": 1 - non_null / total if total else 0.0,
+        "unique_count": unique_count,
+        "unique_ratio": unique_count / total if total else 0.0,
+        "average_length": average_length,
+        "total_characters": int(round(average_length * non_null)),
+    }
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_profile(content_key: str, columns: Tuple[str, ...], _df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame.from_dict(
+        {column: _profile_column(_df[column]) for column in columns}, orient="index"
+    )
+
+
+def profile_columns(df: pd.DataFrame, file_hash: Optional[str] = None) -> pd.DataFrame:
+    """Per-column type, null ratio, unique ratio and text length, computed once per loaded file.
+
+    Columns are profiled with vectorized pandas operations (infer_dtype, nunique, str.len)
+    rather than per-cell Python calls. Without a file hash the frame's content hash is
+    used as the cache key.
+    """
+    columns = tuple(df.columns)
+    content_key = file_hash or dataframe_hash(df)
+    return _cached_profile(content_key, columns, df)
+
+
+def get_text_columns(profile: pd.DataFrame) -> List[str]:
+    """Columns holding only strings (and missing values)"""
+    return profile.index[profile["is_text"].astype(bool)].tolist()
+
+
+def workload_caption(profile: pd.DataFrame, row_count: int) -> str:
+    """Summary of the cells a run will send to the model, for estimating time and cost"""
+    unique_cells = int(profile["unique_count"].sum())
+    total_cells = row_count * len(profile)
+    characters = int(profile["total_characters"].sum())
+    caption = f"{unique_cells:,} unique of {total_cells:,} cells"
+    if characters:
+        caption += f" | ~{characters:,} characters of text"
+    return caption